@@ -0,0 +1,28 @@
+"""add attempt counter to otp codes
+
+Revision ID: 9d4f3b8e21c6
+Revises: 7c2e9a41d5b3
+Create Date: 2026-10-18 11:40:07.518230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4f3b8e21c6'
+down_revision: Union[str, Sequence[str], None] = '7c2e9a41d5b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('otp_codes', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('otp_codes', 'attempts')
@@ -0,0 +1,41 @@
+"""store session refresh tokens as sha256 digests
+
+Revision ID: b6e1d0a7c932
+Revises: 9d4f3b8e21c6
+Create Date: 2026-10-18 13:05:44.902117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e1d0a7c932'
+down_revision: Union[str, Sequence[str], None] = '9d4f3b8e21c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('user_sessions', sa.Column('refresh_token_hash', sa.LargeBinary(length=32), nullable=True))
+    # Same digest as dependencies.hash_refresh_token, so existing cookies keep working
+    op.execute("UPDATE user_sessions SET refresh_token_hash = sha256(convert_to(refresh_token, 'UTF8'))")
+    op.alter_column('user_sessions', 'refresh_token_hash', nullable=False)
+    op.create_index(op.f('ix_user_sessions_refresh_token_hash'), 'user_sessions', ['refresh_token_hash'], unique=True)
+    op.drop_index(op.f('ix_user_sessions_refresh_token'), table_name='user_sessions', if_exists=True)
+    op.drop_column('user_sessions', 'refresh_token')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Raw tokens cannot be recovered from digests: existing sessions are ended and
+    # given a unique placeholder so the old NOT NULL / UNIQUE column can be restored
+    op.add_column('user_sessions', sa.Column('refresh_token', sa.String(), nullable=True))
+    op.execute("UPDATE user_sessions SET refresh_token = 'revoked:' || id, is_active = false")
+    op.alter_column('user_sessions', 'refresh_token', nullable=False)
+    op.create_index(op.f('ix_user_sessions_refresh_token'), 'user_sessions', ['refresh_token'], unique=True)
+    op.drop_index(op.f('ix_user_sessions_refresh_token_hash'), table_name='user_sessions')
+    op.drop_column('user_sessions', 'refresh_token_hash')
@@ -0,0 +1,100 @@
+"""range-partition security_events on created_at
+
+Revision ID: c3a8f5d2b417
+Revises: b6e1d0a7c932
+Create Date: 2026-10-18 15:42:10.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a8f5d2b417'
+down_revision: Union[str, Sequence[str], None] = 'b6e1d0a7c932'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Weekly (Monday 00:00 UTC) partitions, matching the default
+# security_event_partition_interval; the app creates later ones itself. There
+# is no DEFAULT partition: it would rule out DETACH PARTITION CONCURRENTLY.
+PARTITIONS_AHEAD = 4
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE security_events RENAME TO security_events_unpartitioned")
+    op.execute("ALTER INDEX ix_security_events_id RENAME TO ix_security_events_unpartitioned_id")
+    op.execute("ALTER TABLE security_events_unpartitioned RENAME CONSTRAINT security_events_pkey TO security_events_unpartitioned_pkey")
+
+    op.execute("""
+        CREATE TABLE security_events (
+            id INTEGER NOT NULL DEFAULT nextval('security_events_id_seq'),
+            user_id INTEGER REFERENCES users (id) ON DELETE CASCADE,
+            event_type eventtype NOT NULL,
+            ip_address VARCHAR,
+            event_metadata JSON,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT security_events_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE security_events_id_seq OWNED BY security_events.id")
+    op.create_index(op.f('ix_security_events_id'), 'security_events', ['id'], unique=False)
+
+    op.execute(f"""
+        DO $$
+        DECLARE
+            start_at timestamptz;
+            end_at timestamptz := date_trunc('week', now() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+                                  + interval '{PARTITIONS_AHEAD + 1} weeks';
+        BEGIN
+            SELECT date_trunc('week', coalesce(min(created_at), now()) AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+              INTO start_at FROM security_events_unpartitioned;
+            WHILE start_at < end_at LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF security_events FOR VALUES FROM (%L) TO (%L)',
+                    'security_events_p' || to_char(start_at AT TIME ZONE 'UTC', 'YYYYMMDD'),
+                    start_at, start_at + interval '1 week'
+                );
+                start_at := start_at + interval '1 week';
+            END LOOP;
+        END $$
+    """)
+
+    op.execute("""
+        INSERT INTO security_events (id, user_id, event_type, ip_address, event_metadata, created_at)
+        SELECT id, user_id, event_type, ip_address, event_metadata, coalesce(created_at, now())
+        FROM security_events_unpartitioned
+    """)
+    op.drop_table('security_events_unpartitioned')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER SEQUENCE security_events_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE security_events RENAME TO security_events_partitioned")
+    op.execute("ALTER INDEX ix_security_events_id RENAME TO ix_security_events_partitioned_id")
+    op.execute("ALTER TABLE security_events_partitioned RENAME CONSTRAINT security_events_pkey TO security_events_partitioned_pkey")
+
+    op.create_table('security_events',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('security_events_id_seq')"), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('event_type', postgresql.ENUM(name='eventtype', create_type=False), nullable=False),
+    sa.Column('ip_address', sa.String(), nullable=True),
+    sa.Column('event_metadata', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("ALTER SEQUENCE security_events_id_seq OWNED BY security_events.id")
+    op.create_index(op.f('ix_security_events_id'), 'security_events', ['id'], unique=False)
+    op.execute("""
+        INSERT INTO security_events (id, user_id, event_type, ip_address, event_metadata, created_at)
+        SELECT id, user_id, event_type, ip_address, event_metadata, created_at
+        FROM security_events_partitioned
+    """)
+    # Dropping the parent drops every partition with it
+    op.drop_table('security_events_partitioned')
@@ -0,0 +1,55 @@
+"""indexes for security event hot queries
+
+Revision ID: e4f7a2c91b6d
+Revises: c3a8f5d2b417
+Create Date: 2026-10-18 16:20:37.551806
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4f7a2c91b6d'
+down_revision: Union[str, Sequence[str], None] = 'c3a8f5d2b417'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (parent index, partition index suffix, definition)
+INDEXES = [
+    ('ix_security_events_user_type_created', 'user_type_created', '(user_id, event_type, created_at)'),
+    ('ix_security_events_user_created_id', 'user_created_id', '(user_id, created_at, id)'),
+    ('ix_security_events_created_id', 'created_id', '(created_at, id)'),
+    ('ix_security_events_failed_login_created', 'failed_login_created', "(created_at) WHERE event_type = 'FAILED_LOGIN'"),
+    ('ix_security_events_active_session_created', 'active_session_created', "(created_at, user_id) WHERE event_type = 'ACTIVE_SESSION'"),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    partitions = op.get_bind().execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'security_events'::regclass"
+    )).scalars().all()
+
+    # A plain CREATE INDEX on the parent would block writes while it builds every
+    # partition's index. Instead: an empty index ON ONLY the parent, a concurrent
+    # build per partition, then attach each one; the parent index becomes valid
+    # once every partition is attached. Partitions created later inherit them.
+    for name, _, definition in INDEXES:
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY security_events {definition}")
+    with op.get_context().autocommit_block():
+        for name, suffix, definition in INDEXES:
+            for partition in partitions:
+                partition_index = f"{partition}_{suffix}_idx"
+                op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{partition_index}" ON "{partition}" {definition}')
+                op.execute(f'ALTER INDEX {name} ATTACH PARTITION "{partition_index}"')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Dropping a partitioned index drops the attached partition indexes with it
+    for name, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name='security_events')
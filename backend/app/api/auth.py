@@ -5,38 +5,50 @@ from ..core.database import get_db
 from ..core import dependencies
 from ..services.auth_service import AuthService
 from ..services.location_service import LocationService
-import os, uuid, pyotp
+from ..services import location_enrichment
+from ..services.login_limiter import login_limiter
+from ..services.lockout_events import lockout_events
+import asyncio, os, uuid, pyotp
 from ..core.config import settings
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
+REFRESH_COOKIE_MAX_AGE = settings.refresh_token_expire_days * 24 * 3600
+
+def _start_login_location(client_ip: str, payload, http_client) -> asyncio.Future:
+    """Resolve location alongside authentication, or not at all when enrichment is deferred."""
+    if location_enrichment.is_deferred():
+        done = asyncio.get_running_loop().create_future()
+        done.set_result(location_enrichment.PENDING_LOCATION)
+        return done
+    return LocationService.start_login_location(client_ip, payload.latitude, payload.longitude, http_client)
+
 @router.post("/login")
 async def login(request: Request, response: Response, payload: schemas.LoginRequest, db: AsyncSession = Depends(get_db)):
     client_ip = request.client.host
+    # Locked-out clients are turned away before any geolocation, user lookup or bcrypt
+    locked = login_limiter.locked_response(client_ip, payload.username)
+    if locked is not None:
+        lockout_events.record(client_ip, payload.username, payload.latitude, payload.longitude)
+        return locked
+
     http_client = request.app.state.http_client
-    location_str = "Unknown"
-    location_source = "Unknown"
-    
-    if payload.latitude and payload.longitude:
-        location_str = await LocationService.get_coord_location(payload.latitude, payload.longitude, http_client)
-        location_source = "GPS (Precise)"
-        
-    if not location_str or location_str == "Unknown":
-        ip_data = await LocationService.get_ip_location_data(client_ip, http_client)
-        location_str = ip_data["location"]
-        location_source = "IP (Approximate)"
+    location_task = _start_login_location(client_ip, payload, http_client)
 
     auth_service = AuthService(db, http_client)
-    db_user = await auth_service.authenticate_local(
-        email=payload.username, 
-        password=payload.password, 
-        client_ip=client_ip, 
-        location_str=location_str, 
-        location_source=location_source, 
-        lat=payload.latitude, 
-        lon=payload.longitude, 
-        device_info=request.headers.get("User-Agent", "Unknown Device")
-    )
+    try:
+        db_user = await auth_service.authenticate_local(
+            email=payload.username, 
+            password=payload.password, 
+            client_ip=client_ip, 
+            location=location_task, 
+            lat=payload.latitude, 
+            lon=payload.longitude, 
+            device_info=request.headers.get("User-Agent", "Unknown Device")
+        )
+    finally:
+        # Location only feeds the audit trail of failed attempts; 2FA finalizes separately
+        location_task.cancel()
 
     if not db_user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
@@ -71,7 +83,7 @@ async def verify_2fa(request: Request, response: Response, payload: schemas.Veri
         device_info=request.headers.get("User-Agent", "Unknown Device")
     )
 
-    response.set_cookie(key="refresh_token", value=refresh_token, httponly=True, max_age=7*24*3600, samesite="lax", secure=False)
+    response.set_cookie(key="refresh_token", value=refresh_token, httponly=True, max_age=REFRESH_COOKIE_MAX_AGE, samesite="lax", secure=False)
     return {"token": access_token}
 
 
@@ -93,7 +105,7 @@ async def verify_totp_login(request: Request, response: Response, payload: schem
         device_info=request.headers.get("User-Agent", "Unknown Device")
     )
     
-    response.set_cookie(key="refresh_token", value=refresh_token, httponly=True, max_age=7*24*3600, samesite="lax", secure=True) # Secure=True recommended
+    response.set_cookie(key="refresh_token", value=refresh_token, httponly=True, max_age=REFRESH_COOKIE_MAX_AGE, samesite="lax", secure=True) # Secure=True recommended
     return {
         "token": access_token,
         "user": {
@@ -151,28 +163,16 @@ async def resend_otp(request: Request, payload: schemas.ResendOTPRequest, db: As
 async def google_login(request: Request, response: Response, payload: schemas.GoogleLoginRequest, db: AsyncSession = Depends(get_db)):
     client_ip = request.client.host
     http_client = request.app.state.http_client
-    location_str = "Unknown"
-    location_source = "Unknown"
-    
-    if payload.latitude and payload.longitude:
-        location_str = await LocationService.get_coord_location(payload.latitude, payload.longitude, http_client)
-        location_source = "GPS (Precise)"
-        
-    if not location_str or location_str == "Unknown":
-        ip_data = await LocationService.get_ip_location_data(client_ip, http_client)
-        location_str = ip_data["location"]
-        location_source = "IP (Approximate)"
+    location_task = _start_login_location(client_ip, payload, http_client)
 
     auth_service = AuthService(db, http_client)
-    db_user = await auth_service.authenticate_google(
-        code=payload.code, 
-        client_ip=client_ip, 
-        location_str=location_str, 
-        location_source=location_source, 
-        lat=payload.latitude, 
-        lon=payload.longitude, 
-        device_info=request.headers.get("User-Agent", "Unknown Device")
-    )
+    try:
+        db_user, (location_str, location_source) = await asyncio.gather(
+            auth_service.authenticate_google(code=payload.code),
+            location_task
+        )
+    finally:
+        location_task.cancel()
 
     if db_user.is_totp_enabled:
         return {"status": "TOTP_REQUIRED", "user_id": db_user.id}
@@ -187,7 +187,7 @@ async def google_login(request: Request, response: Response, payload: schemas.Go
         device_info=request.headers.get("User-Agent", "Unknown Device")
     )
 
-    response.set_cookie(key="refresh_token", value=refresh_token, httponly=True, max_age=7*24*3600, samesite="lax", secure=False)
+    response.set_cookie(key="refresh_token", value=refresh_token, httponly=True, max_age=REFRESH_COOKIE_MAX_AGE, samesite="lax", secure=False)
     return {
         "token": access_token,
         "user": {
@@ -204,28 +204,16 @@ async def google_login(request: Request, response: Response, payload: schemas.Go
 async def clio_login(request: Request, response: Response, payload: schemas.ClioLoginRequest, db: AsyncSession = Depends(get_db)):
     client_ip = request.client.host
     http_client = request.app.state.http_client
-    location_str = "Unknown"
-    location_source = "Unknown"
-    
-    if payload.latitude and payload.longitude:
-        location_str = await LocationService.get_coord_location(payload.latitude, payload.longitude, http_client)
-        location_source = "GPS (Precise)"
-        
-    if not location_str or location_str == "Unknown":
-        ip_data = await LocationService.get_ip_location_data(client_ip, http_client)
-        location_str = ip_data["location"]
-        location_source = "IP (Approximate)"
+    location_task = _start_login_location(client_ip, payload, http_client)
 
     auth_service = AuthService(db, http_client)
-    db_user = await auth_service.authenticate_clio(
-        code=payload.code, 
-        client_ip=client_ip, 
-        location_str=location_str, 
-        location_source=location_source, 
-        lat=payload.latitude, 
-        lon=payload.longitude, 
-        device_info=request.headers.get("User-Agent", "Unknown Device")
-    )
+    try:
+        db_user, (location_str, location_source) = await asyncio.gather(
+            auth_service.authenticate_clio(code=payload.code),
+            location_task
+        )
+    finally:
+        location_task.cancel()
 
     if db_user.is_totp_enabled:
         return {"status": "TOTP_REQUIRED", "user_id": db_user.id}
@@ -240,7 +228,7 @@ async def clio_login(request: Request, response: Response, payload: schemas.Clio
         device_info=request.headers.get("User-Agent", "Unknown Device")
     )
 
-    response.set_cookie(key="refresh_token", value=refresh_token, httponly=True, max_age=7*24*3600, samesite="lax", secure=False)
+    response.set_cookie(key="refresh_token", value=refresh_token, httponly=True, max_age=REFRESH_COOKIE_MAX_AGE, samesite="lax", secure=False)
     return {
         "token": access_token,
         "user": {
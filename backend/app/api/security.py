@@ -1,45 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query, WebSocket, WebSocketDisconnect
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, desc
 from typing import List, Optional
 from datetime import datetime, timedelta, timezone
-from fastapi.security import HTTPBearer
 
 from .. import models, schemas
 from ..core import database, dependencies
+from ..core.pagination import newest_first, set_next_cursor
 from ..services.websocket import security_ws_manager
+from ..repositories.session_repo import SessionRepository
+from ..core.password_hasher import password_hasher
+from ..core.rate_limit import rate_limiter
+from ..core.session_state import session_state_cache, token_generation_cache, verified_token_cache
+from ..services.location_service import ip_location_cache, coord_location_cache
+from ..services.location_enrichment import location_enrichment_worker
+from ..services.otp_store import memory_otp_store
+from ..services.login_limiter import login_limiter
+from ..services.lockout_events import lockout_events
+from ..services.event_writer import security_event_writer
+from ..services.last_active import last_active_buffer
+from ..services.maintenance import maintenance_scheduler, partition_maintainer
 from ..logger import get_logger
 
 logger = get_logger(__name__)
 
-token_auth_scheme = HTTPBearer()
-
 router = APIRouter(
     prefix="/api/admin/security",
     tags=['Security Dashboard']
 )
 
 async def require_admin(
-    current_user = Depends(dependencies.get_current_user),
-    db: AsyncSession = Depends(database.get_db), 
-    token = Depends(token_auth_scheme)
+    identity: dependencies.RequestIdentity = Depends(dependencies.get_identity)
 ):
-    
-    role = getattr(current_user, 'role', None)
-    if not role and isinstance(current_user, dict):
-        role = current_user.get('role')
-
-    if not role:
-        email = getattr(current_user, 'email', None) 
-        if not email and isinstance(current_user, dict):
-            email = current_user.get('email') or current_user.get('sub') 
-
-        if email:
-            stmt = select(models.User).where(models.User.email == email)
-            result = await db.execute(stmt)
-            db_user = result.scalars().first()
-            if db_user:
-                role = db_user.role
+    current_user = identity.payload
+    db_user = await identity.get_user()
+    role = db_user.role if db_user else None
 
     logger.debug("admin_role_check", extra={"role": str(role)})
 
@@ -53,8 +48,10 @@ async def require_admin(
 
 @router.get("/events", response_model=List[schemas.SecurityEventOut])
 async def get_security_events(
+    response: Response,
     skip: int = 0, 
     limit: int = 20,
+    cursor: Optional[str] = None,
     event_type: Optional[models.EventType] = None,
     user_id: Optional[int] = None,
     db: AsyncSession = Depends(database.get_db),
@@ -67,10 +64,11 @@ async def get_security_events(
     if user_id:
         stmt = stmt.where(models.SecurityEvent.user_id == user_id)
 
-    stmt = stmt.order_by(desc(models.SecurityEvent.created_at)).offset(skip).limit(limit)
+    stmt = newest_first(stmt, models.SecurityEvent, cursor).offset(skip).limit(limit)
     
     result = await db.execute(stmt)
     events = result.scalars().all()
+    set_next_cursor(response, events, limit)
 
     for event in events:
         if event.user_id:
@@ -114,7 +112,7 @@ async def get_active_users(
             ip_stmt = select(models.SecurityEvent).where(
                 models.SecurityEvent.user_id == user.id,
                 models.SecurityEvent.event_type == models.EventType.ACTIVE_SESSION
-            ).order_by(desc(models.SecurityEvent.created_at))
+            ).order_by(desc(models.SecurityEvent.created_at)).limit(1)
             
             ip_result = await db.execute(ip_stmt)
             last_login_event = ip_result.scalars().first()
@@ -156,17 +154,57 @@ async def revoke_user_session(
     db: AsyncSession = Depends(database.get_db),
     admin = Depends(require_admin)
 ):
-    stmt = select(models.UserSession).where(models.UserSession.id == session_id)
-    result = await db.execute(stmt)
-    session = result.scalars().first()
+    revoked = await SessionRepository(db).revoke_many(session_ids=[session_id])
     
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-        
-    session.is_active = False
-    await db.commit()
+    if not revoked:
+        raise HTTPException(status_code=404, detail="Session not found or already revoked")
     return {"message": "Session revoked successfully"}
 
+@router.post("/sessions/revoke", response_model=schemas.BulkRevokeResult)
+async def revoke_sessions_bulk(
+    request: schemas.BulkRevokeRequest,
+    db: AsyncSession = Depends(database.get_db),
+    admin = Depends(require_admin)
+):
+    """Revoke every active session matching all of the given filters in one statement."""
+    if request.user_id is None and not request.device_pattern and not request.ip_address:
+        raise HTTPException(status_code=400, detail="Provide at least one of user_id, device_pattern or ip_address")
+
+    revoked = await SessionRepository(db).revoke_many(
+        user_id=request.user_id,
+        device_pattern=request.device_pattern,
+        ip_address=request.ip_address,
+    )
+    logger.info("sessions_bulk_revoked", extra={
+        "admin": admin.get("sub"),
+        "user_id": request.user_id,
+        "device_pattern": request.device_pattern,
+        "ip_address": request.ip_address,
+        "revoked": len(revoked),
+    })
+    return {"revoked": len(revoked), "session_ids": revoked}
+
+@router.get("/metrics")
+async def get_runtime_metrics(admin = Depends(require_admin)):
+    """In-process counters used to size worker pools and caches."""
+    return {
+        "password_hasher": password_hasher.stats(),
+        "session_state_cache": session_state_cache.stats(),
+        "token_generation_cache": token_generation_cache.stats(),
+        "verified_token_cache": verified_token_cache.stats(),
+        "ip_geo_cache": ip_location_cache.stats(),
+        "coord_geo_cache": coord_location_cache.stats(),
+        "location_enrichment": location_enrichment_worker.stats(),
+        "memory_otp_store": memory_otp_store.stats(),
+        "login_limiter": login_limiter.stats(),
+        "lockout_events": lockout_events.stats(),
+        "security_event_writer": security_event_writer.stats(),
+        "last_active_buffer": last_active_buffer.stats(),
+        "maintenance": maintenance_scheduler.stats(),
+        "partition_maintainer": partition_maintainer.stats(),
+        "rate_limiter": rate_limiter.stats(),
+    }
+
 @router.websocket("/ws")
 async def websocket_security_endpoint(websocket: WebSocket):
     await security_ws_manager.connect(websocket)
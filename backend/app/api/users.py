@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Form, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Form, File, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, desc
 import os, uuid
@@ -6,6 +6,9 @@ from typing import List
 
 from .. import models, schemas
 from ..core import database, dependencies
+from ..core.pagination import newest_first, set_next_cursor
+from ..repositories.user_repo import UserRepository
+from ..repositories.session_repo import SessionRepository
 
 router = APIRouter(prefix="/api/users", tags=["Users"])
 
@@ -22,17 +25,8 @@ async def get_all_users(
 
 @router.get("/me")
 async def get_user_info(
-    current_user: dict = Depends(dependencies.get_current_user), 
-    db: AsyncSession = Depends(database.get_db)
+    db_user: models.User = Depends(dependencies.get_current_db_user)
 ):
-    email = current_user.get("sub")
-    stmt = select(models.User).where(models.User.email == email)
-    result = await db.execute(stmt)
-    db_user = result.scalars().first()
-    
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     return {
         "id": db_user.id,
         "name": db_user.name,
@@ -47,16 +41,10 @@ async def get_user_info(
 async def update_my_profile(
     name: str = Form(None),
     avatar: UploadFile = File(None),
-    current_user: dict = Depends(dependencies.get_current_user),
+    db_user: models.User = Depends(dependencies.get_current_db_user),
     db: AsyncSession = Depends(database.get_db)
 ):
-    email = current_user.get("sub")
-    from ..repositories.user_repo import UserRepository
     user_repo = UserRepository(db)
-    db_user = await user_repo.get_by_email(email)
-    
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
         
     update_data = {}
     if name:
@@ -114,31 +102,17 @@ async def change_user_role(
 
     # Invalidate all active sessions for the user whose role changed.
     # This forces them to re-login and get a fresh token reflecting the new role.
-    sessions_stmt = select(models.UserSession).where(
-        models.UserSession.user_id == user_to_update.id,
-        models.UserSession.is_active == True
-    )
-    sessions_result = await db.execute(sessions_stmt)
-    active_sessions = sessions_result.scalars().all()
-    for session in active_sessions:
-        session.is_active = False
-    await db.commit()
+    # The generation bump kills outstanding access tokens; the session revoke kills refresh.
+    await UserRepository(db).bump_token_generation(user_to_update.id)
+    await SessionRepository(db).revoke_all_for_user(user_to_update.id)
 
     return user_to_update
 
 @router.get("/me/sessions", response_model=List[schemas.UserSessionOut])
 async def get_my_sessions(
-    current_user: dict = Depends(dependencies.get_current_user),
+    db_user: models.User = Depends(dependencies.get_current_db_user),
     db: AsyncSession = Depends(database.get_db)
 ):
-    email = current_user.get("sub")
-    user_stmt = select(models.User).where(models.User.email == email)
-    user_res = await db.execute(user_stmt)
-    db_user = user_res.scalars().first()
-    
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
-        
     stmt = select(models.UserSession).where(
         models.UserSession.user_id == db_user.id,
         models.UserSession.is_active == True
@@ -150,55 +124,34 @@ async def get_my_sessions(
 @router.delete("/me/sessions/{session_id}")
 async def revoke_my_session(
     session_id: int,
-    current_user: dict = Depends(dependencies.get_current_user),
+    db_user: models.User = Depends(dependencies.get_current_db_user),
     db: AsyncSession = Depends(database.get_db)
 ):
-    email = current_user.get("sub")
-    user_stmt = select(models.User).where(models.User.email == email)
-    user_res = await db.execute(user_stmt)
-    db_user = user_res.scalars().first()
-    
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
-        
-    stmt = select(models.UserSession).where(
-        models.UserSession.id == session_id,
-        models.UserSession.user_id == db_user.id
-    )
-    result = await db.execute(stmt)
-    session = result.scalars().first()
+    revoked = await SessionRepository(db).revoke_many(session_ids=[session_id], user_id=db_user.id)
     
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found or not owned by user")
-        
-    session.is_active = False
-    await db.commit()
+    if not revoked:
+        raise HTTPException(status_code=404, detail="Session not found, already revoked or not owned by user")
     return {"message": "Session revoked successfully"}
 
 @router.get("/me/security-events", response_model=List[schemas.SecurityEventOut])
 async def get_my_security_events(
+    response: Response,
     skip: int = 0,
     limit: int = 20,
+    cursor: str = None,
     event_type: str = None,
-    current_user: dict = Depends(dependencies.get_current_user),
+    db_user: models.User = Depends(dependencies.get_current_db_user),
     db: AsyncSession = Depends(database.get_db)
 ):
-    email = current_user.get("sub")
-    user_stmt = select(models.User).where(models.User.email == email)
-    user_res = await db.execute(user_stmt)
-    db_user = user_res.scalars().first()
-    
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
-        
     stmt = select(models.SecurityEvent).where(models.SecurityEvent.user_id == db_user.id)
     
     if event_type:
         stmt = stmt.where(models.SecurityEvent.event_type == event_type)
         
-    stmt = stmt.order_by(desc(models.SecurityEvent.created_at)).offset(skip).limit(limit)
+    stmt = newest_first(stmt, models.SecurityEvent, cursor).offset(skip).limit(limit)
     result = await db.execute(stmt)
     events = result.scalars().all()
+    set_next_cursor(response, events, limit)
     
     # Attach username for schema compatibility
     for event in events:
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Response
+
+from ..core.config import settings
+from ..core.signing_keys import key_ring
+
+router = APIRouter(tags=["well-known"])
+
+@router.get("/.well-known/jwks.json")
+async def get_jwks(response: Response):
+    """
+    Public keys for verifying our tokens locally; empty while tokens are HS256-signed.
+    Verifiers should refetch when they meet a kid that is not in their cached copy.
+    """
+    response.headers["Cache-Control"] = f"public, max-age={settings.jwks_max_age_s}"
+    if settings.algorithm != "EdDSA":
+        return {"keys": []}
+    return key_ring.jwks()
@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -16,7 +17,97 @@ class Settings(BaseSettings):
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
-    
+    refresh_token_expire_days: int = 7
+
+    # Used when algorithm = "EdDSA": Ed25519 keys in signing_keys_dir, rotated on a
+    # schedule and published at /.well-known/jwks.json. Retired keys stay published
+    # for signing_key_retain_days, which must outlive refresh_token_expire_days.
+    signing_keys_dir: str = os.path.join(BASE_DIR, "data", "signing_keys")
+    signing_key_rotation_days: int = 30
+    signing_key_retain_days: int = 8
+    signing_key_check_interval_s: int = 3600
+    jwks_max_age_s: int = 300
+
+    # Session is_active cache; the TTL bounds revocation staleness across workers
+    session_cache_ttl_s: int = 10
+    session_cache_max_entries: int = 50000
+    # Verified access-token payloads, keyed by token digest
+    token_cache_max_entries: int = 20000
+
+    # bcrypt worker pool; jobs beyond workers + queue size are rejected with 503
+    password_hash_workers: int = 4
+    password_hash_queue_size: int = 64
+
+    # bcrypt cost: a fixed bcrypt_rounds wins, otherwise it is calibrated at
+    # startup to the highest cost that hashes within bcrypt_target_ms.
+    # Pin bcrypt_rounds when running several workers so they agree on one cost.
+    bcrypt_rounds: Optional[int] = None
+    bcrypt_target_ms: int = 150
+    bcrypt_min_rounds: int = 10
+    bcrypt_max_rounds: int = 16
+
+    # Security events are queued and bulk-inserted by a background writer; callers
+    # wait up to the enqueue timeout for queue space before writing inline
+    event_writer_batch_size: int = 200
+    event_writer_flush_interval_s: float = 0.5
+    event_writer_queue_size: int = 10000
+    event_writer_enqueue_timeout_s: float = 1.0
+
+    # Session last_active timestamps are buffered in memory and written in one
+    # batch per interval (or sooner once max_pending sessions are waiting)
+    last_active_flush_interval_s: float = 30.0
+    last_active_max_pending: int = 50000
+
+    # Periodic purge of expired OTPs, sessions and old security events. One worker
+    # per round (Postgres advisory lock); deletes are chunked and time-boxed.
+    maintenance_enabled: bool = True
+    maintenance_interval_s: float = 3600
+    maintenance_jitter_s: float = 300
+    maintenance_batch_size: int = 1000
+    maintenance_time_budget_s: float = 30
+    session_retention_days: int = 30
+    security_event_retention_days: int = 90
+    # security_events range partitions: "day" or "week" (UTC), created this many periods ahead.
+    # Upcoming partitions are checked on their own schedule, even with maintenance disabled.
+    security_event_partition_interval: str = "week"
+    security_event_partitions_ahead: int = 4
+    security_event_partition_check_interval_s: float = 3600
+
+    # Password login lockout: N failures inside the window lock the client IP (and,
+    # when login_lockout_email_failures > 0, the targeted email) until they age out.
+    # Counted per worker and rebuilt from recent FAILED_LOGIN events at startup.
+    login_lockout_window_s: int = 300
+    login_lockout_ip_failures: int = 5
+    login_lockout_email_failures: int = 0
+    login_limiter_max_keys: int = 100000
+    # Rejected attempts from locked-out IPs become one ACCOUNT_LOCKED event per IP per interval
+    lockout_flush_interval_s: float = 30.0
+    lockout_max_pending_ips: int = 10000
+
+    # Token-bucket request limits per client IP: a global bucket plus one per route
+    # group (rate in requests/second, burst = bucket size). Sized so an office behind
+    # one NAT address can log in together; credential guessing is the login limiter's job.
+    rate_limit_enabled: bool = True
+    rate_limit_global_rate: float = 50.0
+    rate_limit_global_burst: int = 300
+    rate_limit_auth_rate: float = 2.0
+    rate_limit_auth_burst: int = 60
+    rate_limit_second_factor_rate: float = 2.0
+    rate_limit_second_factor_burst: int = 60
+    rate_limit_clio_rate: float = 2.0
+    rate_limit_clio_burst: int = 20
+    rate_limit_max_buckets: int = 100000
+    # Comma-separated proxy addresses (or "*") whose X-Forwarded-For/-Proto headers are
+    # trusted for the client address seen by rate limiting, lockouts and logs
+    forwarded_allow_ips: str = "127.0.0.1"
+
+    # Email 2FA codes: "database" (otp_codes table, shared by all workers) or
+    # "memory" (no database writes; codes are only known to the issuing worker)
+    otp_store: str = "database"
+    otp_ttl_s: int = 300
+    otp_max_attempts: int = 5
+    otp_memory_max_entries: int = 10000
+
     google_client_id: str
     google_client_secret: str
     google_redirect_uri: str
@@ -25,6 +116,41 @@ class Settings(BaseSettings):
     clio_client_secret: str
     clio_redirect_uri: str
     clio_base_url: str = "https://app.clio.com"
+
+    # Login geolocation runs alongside authentication and gives up after this budget
+    location_budget_ms: int = 800
+
+    # "inline" resolves location during login; "deferred" writes sessions/events as
+    # "Pending" and patches them in batches from a background worker
+    location_enrichment: str = "inline"
+    location_enrichment_batch_size: int = 50
+    location_enrichment_flush_interval_s: float = 1.0
+    location_enrichment_queue_size: int = 10000
+    location_enrichment_timeout_ms: int = 10000
+
+    # IP geolocation cache; failed lookups are kept for the shorter negative TTL.
+    # Prefix sharing reuses one lookup for a whole /24 (IPv4) or /64 (IPv6).
+    ip_geo_cache_ttl_s: int = 3600
+    ip_geo_cache_negative_ttl_s: int = 300
+    ip_geo_cache_max_entries: int = 10000
+    ip_geo_cache_share_prefix: bool = False
+
+    # GPS reverse-geocoding cache keyed by geohash cell (precision 5 is ~4.9 km x 4.9 km)
+    coord_geo_cache_precision: int = 5
+    coord_geo_cache_ttl_s: int = 86400
+    coord_geo_cache_negative_ttl_s: int = 300
+    coord_geo_cache_max_entries: int = 10000
+
+    # "remote" queries ip-api.com; "local" answers from the mmap'd range table
+    # built with `python -m app.services.geoip build <csv> <out>`
+    geoip_provider: str = "remote"
+    geoip_database_path: str = os.path.join(BASE_DIR, "data", "geoip.bin")
+
+    # "remote" queries Nominatim; "local" picks the nearest centroid from the dataset
+    # (the bundled CSV or a GeoNames cities*.txt dump), up to reverse_geocoder_max_km away
+    reverse_geocoder_provider: str = "remote"
+    reverse_geocoder_dataset_path: str = os.path.join(BASE_DIR, "data", "cities.csv")
+    reverse_geocoder_max_km: float = 75.0
     
     # class Coonfig:
     #     # env_file = ".env"
@@ -1,3 +1,5 @@
+from contextvars import ContextVar
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from .config import settings
@@ -13,6 +15,24 @@ AsyncSessionLocal = sessionmaker(
 
 Base = declarative_base()
 
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+_query_counter: ContextVar[QueryCounter | None] = ContextVar("query_counter", default=None)
+
+def start_query_counter() -> QueryCounter:
+    """Count the SQL statements issued from the current context (one HTTP request)."""
+    counter = QueryCounter()
+    _query_counter.set(counter)
+    return counter
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter.count += 1
+
 async def get_db():
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
@@ -4,27 +4,47 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 import jwt
 import datetime
-import bcrypt
+import hashlib
+import time
 from datetime import datetime, timedelta, timezone
 from .database import get_db
 from ..models import User, UserSession, UserRole
 from .config import settings
+from .password_hasher import password_hasher
+from .session_state import session_state_cache, token_generation_cache, verified_token_cache
+from .signing_keys import key_ring
+from .cache import MISSING
 
 JWT_SECRET = settings.secret_key
 ALGORITHM = settings.algorithm
 
 def hash_password(password: str) -> str:
-    pwd_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password=pwd_bytes, salt=salt)
-    return hashed_password.decode('utf-8') 
+    return password_hasher.hash_sync(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    password_byte_enc = plain_password.encode('utf-8')
-    hashed_password_bytes = hashed_password.encode('utf-8')
-    return bcrypt.checkpw(password=password_byte_enc, hashed_password=hashed_password_bytes)
+    return password_hasher.verify_sync(plain_password, hashed_password)
 
-def create_jwt_token(email: str, name: str, session_id: int = None):
+async def hash_password_async(password: str) -> str:
+    """Hash on the bcrypt worker pool so the event loop keeps serving requests."""
+    return await password_hasher.hash(password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.verify(plain_password, hashed_password)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    return password_hasher.needs_rehash(hashed_password)
+
+def encode_token(payload: dict) -> str:
+    if ALGORITHM == "EdDSA":
+        return key_ring.sign(payload)
+    return jwt.encode(payload, JWT_SECRET, algorithm=ALGORITHM)
+
+def decode_token(token: str) -> dict:
+    if ALGORITHM == "EdDSA":
+        return key_ring.verify(token)
+    return jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
+
+def create_jwt_token(email: str, name: str, session_id: int = None, user_id: int = None, generation: int = None):
     payload = {
         "sub": email,
         "name": name,
@@ -32,23 +52,41 @@ def create_jwt_token(email: str, name: str, session_id: int = None):
     }
     if session_id is not None:
         payload["session_id"] = session_id
-    return jwt.encode(payload, JWT_SECRET, algorithm=ALGORITHM)
+    if user_id is not None and generation is not None:
+        payload["uid"] = user_id
+        payload["gen"] = generation
+    return encode_token(payload)
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verify an access token, serving repeat presentations of the same token from
+    `verified_token_cache` until its `exp` instead of re-running signature verification.
+    """
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = verified_token_cache.get(digest)
+    if payload is not MISSING:
+        return dict(payload)
+
+    payload = decode_token(token)
+    exp = payload.get("exp")
+    if exp is not None:
+        verified_token_cache.set(digest, payload, ttl=exp - time.time())
+    return dict(payload)
 
 def create_refresh_token(email: str) -> str:
-    """a 7 day refresh token"""
-    expire = datetime.now(timezone.utc) + timedelta(days = 7)
+    """a refresh token valid for refresh_token_expire_days"""
+    expire = datetime.now(timezone.utc) + timedelta(days=settings.refresh_token_expire_days)
     to_encode = {"sub": email, "type": "refresh", "exp": expire}
 
-    encoded_jwt = jwt.encode(
-        to_encode, 
-        settings.secret_key,
-        algorithm = settings.algorithm
-    )
-    return encoded_jwt
+    return encode_token(to_encode)
+
+def hash_refresh_token(token: str) -> bytes:
+    """Digest under which a refresh token's session is stored and looked up."""
+    return hashlib.sha256(token.encode("utf-8")).digest()
 
 def verify_refresh_token(token: str):
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms = [settings.algorithm])
+        payload = decode_token(token)
         if payload.get("type") != "refresh":
             return None
         return payload.get("sub")
@@ -66,15 +104,30 @@ async def get_current_user(
 ):
     token = token_data.credentials
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         
         session_id = payload.get("session_id")
         if session_id:
-            stmt = select(UserSession).where(UserSession.id == session_id)
-            result = await db.execute(stmt)
-            active_session = result.scalars().first()
-            if not active_session or not active_session.is_active:
+            is_active = session_state_cache.get(session_id)
+            if is_active is None:
+                stmt = select(UserSession.is_active).where(UserSession.id == session_id)
+                result = await db.execute(stmt)
+                is_active = bool(result.scalar())
+                session_state_cache.remember(session_id, is_active)
+            if not is_active:
                 raise HTTPException(status_code=401, detail="Session revoked or invalid")
+
+        # Tokens issued before generations existed carry no "gen" claim and skip this check
+        user_id = payload.get("uid")
+        if user_id is not None and "gen" in payload:
+            generation = token_generation_cache.get(user_id)
+            if generation is MISSING:
+                stmt = select(User.token_generation).where(User.id == user_id)
+                result = await db.execute(stmt)
+                generation = result.scalar()
+                token_generation_cache.set(user_id, generation)
+            if generation is None or payload["gen"] != generation:
+                raise HTTPException(status_code=401, detail="Token revoked")
                 
         return payload 
     except jwt.ExpiredSignatureError:
@@ -82,35 +135,63 @@ async def get_current_user(
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-async def get_current_admin(
-    user: dict = Depends(get_current_user), 
+class RequestIdentity:
+    """
+    The caller of one request: the verified token payload plus the `User` row,
+    loaded at most once no matter how many dependencies and handlers ask for it.
+    """
+    def __init__(self, payload: dict, db: AsyncSession):
+        self.payload = payload
+        self.db = db
+        self._user = MISSING
+
+    @property
+    def email(self) -> str:
+        return self.payload.get("sub")
+
+    async def get_user(self) -> User | None:
+        if self._user is MISSING:
+            user_id = self.payload.get("uid")
+            if user_id is not None:
+                stmt = select(User).where(User.id == user_id)
+            else:
+                stmt = select(User).where(User.email == self.email)
+            result = await self.db.execute(stmt)
+            self._user = result.scalars().first()
+        return self._user
+
+async def get_identity(
+    request: Request,
+    payload: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
+) -> RequestIdentity:
+    identity = getattr(request.state, "identity", None)
+    if identity is None:
+        identity = RequestIdentity(payload, db)
+        request.state.identity = identity
+    return identity
+
+async def get_current_admin(
+    identity: RequestIdentity = Depends(get_identity)
 ):
-    email = user.get("sub")
-    stmt = select(User).where(User.email == email)
-    result = await db.execute(stmt)
-    db_user = result.scalars().first()
+    db_user = await identity.get_user()
     
     if not db_user or db_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Not authorized. Admins only!")
     return db_user
 
 async def get_current_db_user(
-    token_data: dict = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    identity: RequestIdentity = Depends(get_identity)
 ) -> User:
-    email = token_data.get("sub")
-    from sqlalchemy.orm import selectinload
-    stmt = select(User).options(selectinload(User.clio_connection)).where(User.email == email)
-    result = await db.execute(stmt)
-    db_user = result.scalars().first()
+    db_user = await identity.get_user()
     
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
 
 async def get_clio_user(
-    user: User = Depends(get_current_db_user)
+    user: User = Depends(get_current_db_user),
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """Enforces that the user must be authenticated via Clio."""
     if user.provider != "clio":
@@ -118,6 +199,7 @@ async def get_clio_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied. This action requires Clio authentication."
         )
+    await db.refresh(user, ["clio_connection"])
     return user
 
 async def get_http_client(request: Request) -> httpx.AsyncClient:
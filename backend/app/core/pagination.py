@@ -0,0 +1,48 @@
+"""Keyset (created_at, id) pagination for newest-first event feeds."""
+
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, desc, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()},{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.rsplit(",", 1)
+        created_at, row_id = datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Compared against a timestamptz column, so the offset must be explicit
+    if created_at.tzinfo is None:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return created_at, row_id
+
+
+def newest_first(stmt: Select, model, cursor: Optional[str]) -> Select:
+    """Order `stmt` newest first with `id` as tie-breaker, starting after `cursor` if given."""
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        stmt = stmt.where(
+            # The plain bound on created_at lets Postgres prune partitions; the row
+            # comparison does the exact (created_at, id) cut
+            model.created_at <= created_at,
+            tuple_(model.created_at, model.id) < tuple_(created_at, row_id),
+        )
+    return stmt.order_by(desc(model.created_at), desc(model.id))
+
+
+def set_next_cursor(response: Response, rows: Sequence, limit: int):
+    if rows and len(rows) >= limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
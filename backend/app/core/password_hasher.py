@@ -0,0 +1,143 @@
+"""Bounded thread pool for bcrypt hashing, with the cost calibrated to the host at startup."""
+
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from fastapi import HTTPException, status
+
+from .config import settings
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+
+
+DEFAULT_ROUNDS = 12
+
+
+class PasswordHasher:
+    def __init__(self, max_workers: int, max_queue: int, rounds: int = DEFAULT_ROUNDS):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._pending = 0      # submitted, not yet finished (running + queued)
+        self._running = 0
+        self._peak_pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def hash_sync(self, password: str) -> str:
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+    def verify_sync(self, plain_password: str, hashed_password: str) -> bool:
+        return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """True when the stored hash was produced with a lower cost than the current one."""
+        # Modular crypt format: $2b$<cost>$<salt+digest>
+        parts = hashed_password.split("$")
+        if len(parts) < 4 or not parts[2].isdigit():
+            return False
+        # Only ever upgrade: workers that calibrated different costs must not
+        # rehash the same users back and forth
+        return int(parts[2]) < self.rounds
+
+    def calibrate(self, target_ms: float, min_rounds: int, max_rounds: int, samples: int = 3) -> int:
+        """
+        Pick the highest cost whose hash time stays within `target_ms` on this host.
+        Each extra round doubles the work, so one measurement at `min_rounds`
+        is enough to extrapolate. Blocking; run it off the event loop.
+        """
+        salt = bcrypt.gensalt(rounds=min_rounds)
+        timings = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            bcrypt.hashpw(b"calibration-probe", salt)
+            timings.append((time.perf_counter() - start) * 1000)
+        base_ms = min(timings)
+
+        extra = math.floor(math.log2(target_ms / base_ms)) if base_ms > 0 and target_ms > base_ms else 0
+        self.rounds = max(min_rounds, min(max_rounds, min_rounds + extra))
+
+        logger.info("bcrypt_calibrated", extra={
+            "rounds": self.rounds,
+            "target_ms": target_ms,
+            "base_rounds": min_rounds,
+            "base_ms": round(base_ms, 2),
+            "estimated_ms": round(base_ms * 2 ** (self.rounds - min_rounds), 2),
+        })
+        return self.rounds
+
+    async def calibrate_async(self, target_ms: float, min_rounds: int, max_rounds: int) -> int:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.calibrate, target_ms, min_rounds, max_rounds)
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(self.hash_sync, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(self.verify_sync, plain_password, hashed_password)
+
+    async def _submit(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                rejected = self._rejected
+            else:
+                rejected = None
+                self._pending += 1
+                self._peak_pending = max(self._peak_pending, self._pending)
+
+        if rejected is not None:
+            logger.warning("password_hasher_saturated", extra={"rejected_total": rejected})
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service is busy. Please retry shortly.",
+                headers={"Retry-After": "1"},
+            )
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, self._run, fn, args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+
+    def _run(self, fn, args):
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "rounds": self.rounds,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": max(self._pending - self._running, 0),
+                "peak_pending": self._peak_pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_queue_size,
+    rounds=settings.bcrypt_rounds or DEFAULT_ROUNDS,
+)
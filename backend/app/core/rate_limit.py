@@ -0,0 +1,120 @@
+"""Per-client-IP token-bucket rate limiting, as pure ASGI middleware."""
+
+import json
+import math
+import time
+from dataclasses import dataclass
+
+from .cache import TTLCache, MISSING
+from .config import settings
+
+_RATE_LIMITED_BODY = json.dumps({"detail": "Too many requests"}).encode("utf-8")
+
+
+@dataclass(frozen=True)
+class RouteGroup:
+    name: str
+    prefixes: tuple[str, ...]
+    rate: float   # tokens per second
+    burst: int    # bucket capacity
+
+
+class RateLimiter:
+    def __init__(self, global_rate: float, global_burst: int, groups: list[RouteGroup], max_buckets: int,
+                 clock=time.monotonic):
+        self.global_group = RouteGroup("global", ("/",), global_rate, global_burst)
+        self.groups = groups
+        self._clock = clock
+        self._buckets = TTLCache(max_entries=max_buckets, ttl=global_burst / global_rate, clock=clock)
+        self.rejected: dict[str, int] = {group.name: 0 for group in [self.global_group, *groups]}
+
+    def group_for(self, path: str):
+        """First group with a matching prefix, so more specific groups go first."""
+        for group in self.groups:
+            if path.startswith(group.prefixes):
+                return group
+        return None
+
+    def _take(self, group: RouteGroup, client: str) -> float:
+        """Take one token; returns 0 on success or the seconds until a token is available."""
+        now = self._clock()
+        key = (group.name, client)
+        bucket = self._buckets.get(key)
+        if bucket is MISSING:
+            tokens = float(group.burst)
+        else:
+            tokens, last = bucket
+            tokens = min(group.burst, tokens + (now - last) * group.rate)
+
+        if tokens < 1:
+            self._buckets.set(key, (tokens, now), ttl=(group.burst - tokens) / group.rate)
+            return (1 - tokens) / group.rate
+        tokens -= 1
+        self._buckets.set(key, (tokens, now), ttl=(group.burst - tokens) / group.rate)
+        return 0.0
+
+    def check(self, client: str, path: str) -> float:
+        """0 when the request may proceed, otherwise the Retry-After in seconds."""
+        for group in (self.global_group, self.group_for(path)):
+            if group is None:
+                continue
+            wait = self._take(group, client)
+            if wait > 0:
+                self.rejected[group.name] += 1
+                return wait
+        return 0.0
+
+    def stats(self) -> dict:
+        return {"buckets": len(self._buckets), "evictions": self._buckets.evictions, "rejected": dict(self.rejected)}
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, limiter: RateLimiter = None, exempt_prefixes: tuple[str, ...] = ("/static/",)):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+        self.exempt_prefixes = exempt_prefixes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        client = scope["client"][0] if scope.get("client") else "unknown"
+        wait = self.limiter.check(client, scope["path"])
+        if wait <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(_RATE_LIMITED_BODY)).encode()),
+                (b"retry-after", str(math.ceil(wait)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": _RATE_LIMITED_BODY})
+
+
+rate_limiter = RateLimiter(
+    global_rate=settings.rate_limit_global_rate,
+    global_burst=settings.rate_limit_global_burst,
+    groups=[
+        # Before "auth": the 2FA steps share its /api/auth/login prefix but are not new logins
+        RouteGroup(
+            "second_factor",
+            ("/api/auth/login/verify-2fa", "/api/auth/login/verify-totp", "/api/auth/login/resend-otp"),
+            settings.rate_limit_second_factor_rate,
+            settings.rate_limit_second_factor_burst,
+        ),
+        RouteGroup(
+            "auth",
+            ("/api/auth/login", "/api/auth/register", "/api/auth/google", "/api/auth/clio"),
+            settings.rate_limit_auth_rate,
+            settings.rate_limit_auth_burst,
+        ),
+        RouteGroup("clio", ("/api/clio/",), settings.rate_limit_clio_rate, settings.rate_limit_clio_burst),
+    ],
+    max_buckets=settings.rate_limit_max_buckets,
+)
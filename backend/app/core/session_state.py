@@ -0,0 +1,45 @@
+"""In-process caches consulted by `get_current_user` on every authenticated request."""
+
+from typing import Optional
+
+from .cache import TTLCache, MISSING
+from .config import settings
+
+
+class SessionStateCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self._cache = TTLCache(max_entries=max_entries, ttl=ttl)
+
+    def get(self, session_id: int) -> Optional[bool]:
+        """Cached is_active flag, or None when the session must be read from the database."""
+        value = self._cache.get(session_id)
+        return None if value is MISSING else value
+
+    def remember(self, session_id: int, is_active: bool):
+        self._cache.set(session_id, is_active)
+
+    def mark_revoked(self, *session_ids: int):
+        for session_id in session_ids:
+            self._cache.set(session_id, False)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {**self._cache.stats(), "ttl_s": self._cache.ttl}
+
+
+session_state_cache = SessionStateCache(
+    max_entries=settings.session_cache_max_entries,
+    ttl=settings.session_cache_ttl_s,
+)
+
+token_generation_cache = TTLCache(
+    max_entries=settings.session_cache_max_entries,
+    ttl=settings.session_cache_ttl_s,
+)
+
+verified_token_cache = TTLCache(
+    max_entries=settings.token_cache_max_entries,
+    ttl=settings.access_token_expire_minutes * 60,
+)
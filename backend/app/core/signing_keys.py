@@ -0,0 +1,153 @@
+"""Rotating Ed25519 signing keys for access and refresh tokens, published as a JWKS."""
+
+import asyncio
+import base64
+import os
+import secrets
+import time
+from typing import Optional
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+
+from .config import settings
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+
+DAY_S = 86400
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _created_at(kid: str) -> int:
+    return int(kid.split("-", 1)[0])
+
+
+def _kid_order(kid: str) -> tuple[int, str]:
+    # Kids are second-resolution; the random suffix breaks ties the same way on every worker
+    return _created_at(kid), kid
+
+
+class KeyRing:
+    def __init__(self, directory: str, rotation_s: float, retain_s: float, activation_s: float = 0, clock=time.time):
+        self.directory = directory
+        self.rotation_s = rotation_s
+        self.retain_s = retain_s
+        self.activation_s = activation_s
+        self._clock = clock
+        self._private: dict[str, Ed25519PrivateKey] = {}
+        self._public: dict[str, Ed25519PublicKey] = {}
+        self._jwks: Optional[dict] = None
+
+    def _activates_at(self, kid: str) -> float:
+        return _created_at(kid) + self.activation_s
+
+    @property
+    def current_kid(self) -> Optional[str]:
+        """Newest key past its activation delay; the newest key overall if none is yet (first start)."""
+        now = self._clock()
+        active = [kid for kid in self._private if self._activates_at(kid) <= now]
+        return max(active or self._private, key=_kid_order, default=None)
+
+    def load(self):
+        private, public = {}, {}
+        if os.path.isdir(self.directory):
+            for filename in os.listdir(self.directory):
+                if not filename.endswith(".pem"):
+                    continue
+                kid = filename[:-4]
+                with open(os.path.join(self.directory, filename), "rb") as f:
+                    key = serialization.load_pem_private_key(f.read(), password=None)
+                private[kid] = key
+                public[kid] = key.public_key()
+        self._private, self._public = private, public
+        self._jwks = None
+
+    def _generate(self) -> str:
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        kid = f"{int(self._clock())}-{secrets.token_hex(4)}"
+        key = Ed25519PrivateKey.generate()
+        pem = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+        path = os.path.join(self.directory, f"{kid}.pem")
+        # Write under a temporary name so other workers never load a partial key
+        tmp_path = path + ".tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(pem)
+        os.replace(tmp_path, path)
+        logger.info("signing_key_generated", extra={"kid": kid})
+        return kid
+
+    def rotate_if_due(self) -> bool:
+        """Generate a new signing key when due and drop keys past retention. Returns True on rotation."""
+        self.load()
+        now = self._clock()
+        newest = max(self._private, key=_kid_order, default=None)
+        rotated = False
+        if newest is None or now - _created_at(newest) >= self.rotation_s:
+            self._generate()
+            rotated = True
+            self.load()
+
+        # A key stops signing when its successor activates; keep it until retain_s after that
+        kids = sorted(self._private, key=_kid_order)
+        for kid, successor in zip(kids, kids[1:]):
+            if now - self._activates_at(successor) >= self.retain_s:
+                try:
+                    os.remove(os.path.join(self.directory, f"{kid}.pem"))
+                except FileNotFoundError:
+                    pass
+                logger.info("signing_key_retired", extra={"kid": kid})
+                self._private.pop(kid, None)
+                self._public.pop(kid, None)
+                self._jwks = None
+        return rotated
+
+    async def rotate_periodically(self, interval_s: float):
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                # Directory listing and PEM parsing stay off the event loop
+                await asyncio.to_thread(self.rotate_if_due)
+            except Exception as e:
+                logger.error("signing_key_rotation_failed", extra={"error": str(e)}, exc_info=True)
+
+    def sign(self, payload: dict) -> str:
+        kid = self.current_kid
+        if kid is None:
+            raise RuntimeError("No signing key loaded; call rotate_if_due() at startup")
+        return jwt.encode(payload, self._private[kid], algorithm="EdDSA", headers={"kid": kid})
+
+    def verify(self, token: str) -> dict:
+        kid = jwt.get_unverified_header(token).get("kid")
+        if not kid:
+            raise jwt.InvalidTokenError("Token has no kid")
+        if kid not in self._public:
+            raise jwt.InvalidTokenError("Unknown signing key")
+        return jwt.decode(token, self._public[kid], algorithms=["EdDSA"])
+
+    def jwks(self) -> dict:
+        if self._jwks is None:
+            keys = []
+            for kid in sorted(self._public, key=_kid_order, reverse=True):
+                raw = self._public[kid].public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+                keys.append({"kty": "OKP", "crv": "Ed25519", "alg": "EdDSA", "use": "sig", "kid": kid, "x": _b64url(raw)})
+            self._jwks = {"keys": keys}
+        return self._jwks
+
+
+key_ring = KeyRing(
+    directory=settings.signing_keys_dir,
+    rotation_s=settings.signing_key_rotation_days * DAY_S,
+    retain_s=settings.signing_key_retain_days * DAY_S,
+    # Two check intervals, so every worker has reloaded the directory before the key signs
+    activation_s=settings.signing_key_check_interval_s * 2,
+)
@@ -1,13 +1,26 @@
+import asyncio
 import time
 import os
 import httpx
 from fastapi import FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 
-from .core.database import engine, Base
-from .api import auth, employees, users, security, clio
+from .core.database import engine, Base, AsyncSessionLocal, start_query_counter
+from .api import auth, employees, users, security, clio, well_known
 from .core.config import settings
+from .core.password_hasher import password_hasher
+from .core.pagination import NEXT_CURSOR_HEADER
+from .core.rate_limit import RateLimitMiddleware
+from .core.signing_keys import key_ring
+from .services.location_service import LocationService
+from .services.location_enrichment import location_enrichment_worker
+from .services.login_limiter import login_limiter
+from .services.lockout_events import lockout_events
+from .services.event_writer import security_event_writer
+from .services.last_active import last_active_buffer
+from .services.maintenance import maintenance_scheduler, maintenance_lock, partition_maintainer
 from .logger import setup_logging, get_logger
 
 setup_logging(level=settings.log_level if hasattr(settings, "log_level") else "INFO")
@@ -17,6 +30,10 @@ app = FastAPI()
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+# Added before CORS so that CORS headers are still applied to 429 responses
+if settings.rate_limit_enabled:
+    app.add_middleware(RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -30,11 +47,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     start = time.perf_counter()
+    queries = start_query_counter()
     response = await call_next(request)
     duration_ms = round((time.perf_counter() - start) * 1000, 2)
     logger.info(
@@ -44,25 +63,76 @@ async def log_requests(request: Request, call_next):
             "path": request.url.path,
             "status": response.status_code,
             "duration_ms": duration_ms,
+            "db_queries": queries.count,
             "client": request.client.host if request.client else "unknown",
         }
     )
+    if settings.debug:
+        response.headers["X-DB-Queries"] = str(queries.count)
     return response
 
+# Outermost, so the rate limiter, login lockouts and request logs all see the real
+# client address when the app runs behind a reverse proxy
+app.add_middleware(ProxyHeadersMiddleware, trusted_hosts=settings.forwarded_allow_ips)
+
 @app.on_event("startup")
 async def startup():
     app.state.http_client = httpx.AsyncClient(timeout=20.0)
     os.makedirs("static/profiles", exist_ok=True)
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    # Runs before anything can write events, then keeps going whether or not maintenance is enabled
+    await partition_maintainer.run_once()
+    partition_maintainer.start()
+    async with AsyncSessionLocal() as db:
+        await login_limiter.rebuild(db)
+
+    if settings.algorithm == "EdDSA":
+        async with engine.connect() as conn:
+            # Workers booting together on an empty key directory would each generate a key
+            async with maintenance_lock(conn, wait=True):
+                await asyncio.to_thread(key_ring.rotate_if_due)
+        app.state.key_rotation_task = asyncio.create_task(
+            key_ring.rotate_periodically(settings.signing_key_check_interval_s)
+        )
+
+    if settings.geoip_provider == "local":
+        LocationService.load_geoip_database(settings.geoip_database_path)
+    if settings.reverse_geocoder_provider == "local":
+        await LocationService.load_reverse_geocoder(settings.reverse_geocoder_dataset_path)
+
+    if settings.location_enrichment == "deferred":
+        location_enrichment_worker.start(app.state.http_client)
+
+    security_event_writer.start()
+    lockout_events.start(app.state.http_client)
+    last_active_buffer.start()
+    if settings.maintenance_enabled:
+        maintenance_scheduler.start()
+
+    if not settings.bcrypt_rounds:
+        await password_hasher.calibrate_async(
+            settings.bcrypt_target_ms, settings.bcrypt_min_rounds, settings.bcrypt_max_rounds
+        )
 
     logger.info("application_startup", extra={"env": "development"})
 
 @app.on_event("shutdown")
 async def shutdown():
+    if hasattr(app.state, "key_rotation_task"):
+        app.state.key_rotation_task.cancel()
+    await maintenance_scheduler.stop()
+    await partition_maintainer.stop()
+    await lockout_events.stop()
+    await last_active_buffer.stop()
+    # Event writes can queue enrichment jobs, so the writer drains first
+    await security_event_writer.stop()
+    await location_enrichment_worker.stop()
     if hasattr(app.state, "http_client"):
         await app.state.http_client.aclose()
         logger.info("application_shutdown", extra={"status": "http_client_closed"})
+    password_hasher.shutdown()
+    LocationService.close_geoip_database()
 
 app.include_router(auth.router)
 app.include_router(employees.router)
@@ -70,6 +140,7 @@ app.include_router(users.router)
 app.include_router(security.router)
 
 app.include_router(clio.router)
+app.include_router(well_known.router)
 
 @app.get("/favicon.ico", include_in_schema=False)
 async def favicon():
@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Enum, JSON
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Enum, JSON, LargeBinary, PrimaryKeyConstraint, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .core.database import Base
@@ -17,6 +17,8 @@ class User(Base):
     provider = Column(String, default="local")
     password_hash = Column(String, nullable=True)
     role = Column(Enum(UserRole), default=UserRole.USER)
+    # Embedded in access tokens as "gen"; bumping it revokes every outstanding token
+    token_generation = Column(Integer, nullable=False, default=0, server_default="0")
     
     # 2FA Settings
     totp_secret = Column(String, nullable=True)
@@ -41,14 +43,16 @@ class UserSession(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
-    refresh_token = Column(String, unique=True, index=True, nullable=False)
+    # SHA-256 of the refresh JWT; the token itself is only ever held by the client
+    refresh_token_hash = Column(LargeBinary(32), unique=True, index=True, nullable=False)
     device_info = Column(String, nullable=True) # e.g., "Windows PC - Chrome"
     ip_address = Column(String, nullable=True)
     location = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    last_active = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Written in batches by LastActiveBuffer; other session updates leave it alone
+    last_active = Column(DateTime(timezone=True), server_default=func.now())
     
     user = relationship("User", back_populates="sessions")
 
@@ -70,8 +74,25 @@ class EventType(str, enum.Enum):
 
 class SecurityEvent(Base):
     __tablename__ = "security_events"
+    # Range-partitioned on created_at (see services/partitions.py). Postgres needs the
+    # partition key in the primary key; the ORM still identifies rows by id alone.
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "created_at"),
+        # One event type for one user: suspicious-activity check, last login
+        Index("ix_security_events_user_type_created", "user_id", "event_type", "created_at"),
+        # A user's newest-first history (/me/security-events, /events?user_id=), cursor pages included
+        Index("ix_security_events_user_created_id", "user_id", "created_at", "id"),
+        # Newest-first feed (/events) and created_at windows
+        Index("ix_security_events_created_id", "created_at", "id"),
+        # Login limiter rebuild and /active-users only ever look at one event type
+        Index("ix_security_events_failed_login_created", "created_at",
+              postgresql_where=text("event_type = 'FAILED_LOGIN'")),
+        Index("ix_security_events_active_session_created", "created_at", "user_id",
+              postgresql_where=text("event_type = 'ACTIVE_SESSION'")),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, autoincrement=True, index=True)
     
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"),nullable=True)
 
@@ -79,13 +100,16 @@ class SecurityEvent(Base):
     ip_address = Column(String, nullable=True)
     event_metadata = Column(JSON, default={})
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     user = relationship("User", backref="security_logs")
 
+    __mapper_args__ = {"primary_key": [id]}
+
 class OTPCode(Base):
     __tablename__ = "otp_codes"
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     code = Column(String(6), nullable=False)
     expires_at = Column(DateTime(timezone=True), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
     user = relationship("User", backref="otp_codes")
\ No newline at end of file
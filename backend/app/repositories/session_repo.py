@@ -1,7 +1,8 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from ..models import UserSession
-from datetime import datetime, timezone
+from ..core.session_state import session_state_cache
+from ..core.dependencies import hash_refresh_token
 
 class SessionRepository:
     def __init__(self, db: AsyncSession):
@@ -10,7 +11,7 @@ class SessionRepository:
     async def create(self, user_id: int, refresh_token: str, device_info: str, ip_address: str, location: str) -> UserSession:
         new_session = UserSession(
             user_id=user_id,
-            refresh_token=refresh_token,
+            refresh_token_hash=hash_refresh_token(refresh_token),
             device_info=device_info,
             ip_address=ip_address,
             location=location
@@ -27,16 +28,55 @@ class SessionRepository:
 
     async def get_active_by_refresh_token(self, token: str) -> UserSession | None:
         stmt = select(UserSession).where(
-            UserSession.refresh_token == token,
+            UserSession.refresh_token_hash == hash_refresh_token(token),
             UserSession.is_active == True
         )
         result = await self.db.execute(stmt)
         return result.scalars().first()
 
-    async def update_last_active(self, session: UserSession):
-        session.last_active = datetime.now(timezone.utc)
-        await self.db.commit()
+    async def revoke_many(
+        self,
+        session_ids: list[int] | None = None,
+        user_id: int | None = None,
+        device_pattern: str | None = None,
+        ip_address: str | None = None,
+        refresh_token: str | None = None,
+    ) -> list[int]:
+        """
+        Deactivate every active session matching all given filters with one
+        UPDATE ... RETURNING and return the revoked ids. `device_pattern` is a
+        case-insensitive match on device_info where `*` is a wildcard.
+        """
+        criteria = []
+        if session_ids is not None:
+            criteria.append(UserSession.id.in_(session_ids))
+        if user_id is not None:
+            criteria.append(UserSession.user_id == user_id)
+        if device_pattern:
+            criteria.append(UserSession.device_info.ilike(_like_pattern(device_pattern), escape="\\"))
+        if ip_address:
+            criteria.append(UserSession.ip_address == ip_address)
+        if refresh_token is not None:
+            criteria.append(UserSession.refresh_token_hash == hash_refresh_token(refresh_token))
+        if not criteria:
+            raise ValueError("revoke_many needs at least one filter")
 
-    async def revoke(self, session: UserSession):
-        session.is_active = False
+        stmt = (
+            update(UserSession)
+            .where(UserSession.is_active == True, *criteria)
+            .values(is_active=False)
+            .returning(UserSession.id)
+        )
+        result = await self.db.execute(stmt)
+        revoked_ids = list(result.scalars().all())
         await self.db.commit()
+        session_state_cache.mark_revoked(*revoked_ids)
+        return revoked_ids
+
+    async def revoke_all_for_user(self, user_id: int) -> list[int]:
+        return await self.revoke_many(user_id=user_id)
+
+
+def _like_pattern(pattern: str) -> str:
+    escaped = pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped.replace("*", "%")
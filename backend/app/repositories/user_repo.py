@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from ..models import User
+from ..core.session_state import token_generation_cache
 
 class UserRepository:
     def __init__(self, db: AsyncSession):
@@ -34,3 +35,18 @@ class UserRepository:
             setattr(user, key, value)
         await self.db.commit()
         return user
+
+    async def bump_token_generation(self, user_id: int) -> int | None:
+        """Invalidate every access token issued to the user with one UPDATE."""
+        stmt = (
+            update(User)
+            .where(User.id == user_id)
+            .values(token_generation=User.token_generation + 1)
+            .returning(User.token_generation)
+        )
+        result = await self.db.execute(stmt)
+        generation = result.scalar()
+        await self.db.commit()
+        if generation is not None:
+            token_generation_cache.set(user_id, generation)
+        return generation
@@ -1,5 +1,5 @@
 from pydantic import BaseModel ,EmailStr
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 from .models import EventType, UserRole
 
@@ -64,10 +64,18 @@ class BookSlotRequest(BaseModel):
     summary: str
     timezone_offset: str = "+00:00"
 
+class BulkRevokeRequest(BaseModel):
+    user_id: Optional[int] = None
+    device_pattern: Optional[str] = None  # "*" is a wildcard, e.g. "*iPhone*"
+    ip_address: Optional[str] = None
+
+class BulkRevokeResult(BaseModel):
+    revoked: int
+    session_ids: List[int]
+
 class UserSessionOut(BaseModel):
     id: int
     user_id: int
-    refresh_token: str
     device_info: Optional[str] = None
     ip_address: Optional[str] = None
     location: Optional[str] = None
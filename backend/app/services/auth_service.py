@@ -1,13 +1,15 @@
-import random
-from datetime import datetime, timedelta, timezone
+from typing import Awaitable
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
 from ..core import dependencies
 from ..repositories.user_repo import UserRepository
 from ..repositories.session_repo import SessionRepository
 from ..services.security_service import SecurityService
-from ..models import User, EventType, ClioConnection, OTPCode
+from ..services.login_limiter import login_limiter, LOCKED_OUT_DETAIL
+from ..services.lockout_events import lockout_events
+from ..services.last_active import last_active_buffer
+from ..services.otp_store import OTPResult, get_otp_store
+from ..models import User, EventType, ClioConnection
 import httpx
 import pyotp
 from ..core.config import settings
@@ -19,28 +21,21 @@ class AuthService:
         self.user_repo = UserRepository(db)
         self.session_repo = SessionRepository(db)
 
-    async def authenticate_local(self, email: str, password: str, client_ip: str, location_str: str, location_source: str, lat: float, lon: float, device_info: str):
-        if await SecurityService.is_ip_locked_out(self.db, client_ip):
-            target_user = await self.user_repo.get_by_email(email)
-            await SecurityService.log_event(
-                self.db, 
-                EventType.ACCOUNT_LOCKED, 
-                client_ip, 
-                user_id=target_user.id if target_user else None, 
-                event_metadata={
-                    "reason": "Too many failed attempts",
-                    "targeted_email": email,
-                    "location": location_str, 
-                    "location_source": location_source,
-                    "lat": lat,
-                    "lon": lon
-                }
-            )
-            raise HTTPException(status_code=429, detail="Too many failed login attempts. Please try again in 5 minutes.")
+    async def authenticate_local(self, email: str, password: str, client_ip: str, location: Awaitable[tuple[str, str]], lat: float, lon: float, device_info: str):
+        """
+        `location` resolves to (location_str, location_source). It is only awaited
+        when an audit event is written, so a successful check never waits on it.
+        """
+        if login_limiter.is_locked(client_ip, email):
+            lockout_events.record(client_ip, email, lat, lon)
+            raise HTTPException(status_code=429, detail=LOCKED_OUT_DETAIL)
 
         db_user = await self.user_repo.get_by_email(email)
 
-        if not db_user or not db_user.password_hash or not dependencies.verify_password(password, db_user.password_hash):
+        if not db_user or not db_user.password_hash or not await dependencies.verify_password_async(password, db_user.password_hash):
+            login_limiter.record_failure(client_ip, email)
+            location_str, location_source = await location
+            # Queued for the batched writer, which also schedules enrichment of a "Pending" location
             await SecurityService.log_event(
                 self.db, EventType.FAILED_LOGIN, client_ip, 
                 user_id=db_user.id if db_user else None, 
@@ -54,10 +49,21 @@ class AuthService:
             )
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
+        if dependencies.password_needs_rehash(db_user.password_hash):
+            await self._rehash_password(db_user, password)
+
         # Return user for 2FA step — do NOT finalize login yet
         return db_user
 
-    async def authenticate_google(self, code: str, client_ip: str, location_str: str, location_source: str, lat: float, lon: float, device_info: str):
+    async def _rehash_password(self, db_user: User, password: str):
+        """Upgrade a hash stored at an outdated bcrypt cost; never fails the login."""
+        try:
+            new_hash = await dependencies.hash_password_async(password)
+        except HTTPException:
+            return  # hashing pool saturated; try again on a later login
+        await self.user_repo.update(db_user, password_hash=new_hash)
+
+    async def _get_google_tokens(self, code: str) -> dict:
         token_url = "https://oauth2.googleapis.com/token"
         token_data = {
             "client_id": settings.google_client_id,
@@ -81,7 +87,7 @@ class AuthService:
         user_info_res.raise_for_status() # Raise an exception for bad status codes
         return user_info_res.json()
 
-    async def authenticate_google(self, code: str, client_ip: str, location_str: str, location_source: str, lat, lon, device_info: str):
+    async def authenticate_google(self, code: str):
         google_tokens = await self._get_google_tokens(code)
         access_token = google_tokens.get("access_token")
         
@@ -105,7 +111,7 @@ class AuthService:
         # We return the user. The API layer will decide if TOTP is needed.
         return db_user
 
-    async def authenticate_clio(self, code: str, client_ip: str, location_str: str, location_source: str, lat: float, lon: float, device_info: str):
+    async def authenticate_clio(self, code: str):
         base_url = settings.clio_base_url
         
         token_url = f"{base_url}/oauth/token"
@@ -223,11 +229,26 @@ class AuthService:
 
     async def _finalize_login(self, db_user, client_ip, location_str, location_source, lat, lon, device_info, provider="local"):
         await SecurityService.check_suspicious_activity(self.db, db_user.id, client_ip)
+
+        refresh_token = dependencies.create_refresh_token(db_user.email)
+        
+        new_session = await self.session_repo.create(
+            user_id=db_user.id,
+            refresh_token=refresh_token,
+            device_info=device_info,
+            ip_address=client_ip,
+            location=location_str
+        )
+
+        # Durable: check_suspicious_activity reads recent ACTIVE_SESSION rows back.
+        # A pending location is resolved for the event and the session by one job.
         await SecurityService.log_event(
             self.db, 
             EventType.ACTIVE_SESSION, 
             client_ip, 
             user_id=db_user.id,
+            durable=True,
+            session_id=new_session.id,
             event_metadata={
                 "provider": provider,
                 "location": location_str, 
@@ -237,17 +258,7 @@ class AuthService:
             } 
         )
 
-        refresh_token = dependencies.create_refresh_token(db_user.email)
-        
-        new_session = await self.session_repo.create(
-            user_id=db_user.id,
-            refresh_token=refresh_token,
-            device_info=device_info,
-            ip_address=client_ip,
-            location=location_str
-        )
-
-        access_token = dependencies.create_jwt_token(db_user.email, db_user.name, new_session.id)
+        access_token = dependencies.create_jwt_token(db_user.email, db_user.name, new_session.id, db_user.id, db_user.token_generation)
         print(f"DEBUG: Login Token for {db_user.email}: {access_token}")
         
         return access_token, refresh_token, db_user
@@ -268,23 +279,21 @@ class AuthService:
         if not db_user:
             raise HTTPException(status_code=401, detail="User not found")
             
-        await self.session_repo.update_last_active(active_session)
+        last_active_buffer.touch(active_session.id)
         
-        new_access_token = dependencies.create_jwt_token(db_user.email, db_user.name, active_session.id)
+        new_access_token = dependencies.create_jwt_token(db_user.email, db_user.name, active_session.id, db_user.id, db_user.token_generation)
         return new_access_token
 
     async def logout(self, refresh_token_str: str):
         if refresh_token_str:
-            active_session = await self.session_repo.get_active_by_refresh_token(refresh_token_str)
-            if active_session:
-                await self.session_repo.revoke(active_session)
+            await self.session_repo.revoke_many(refresh_token=refresh_token_str)
 
     async def register(self, email: str, name: str, password: str, avatar_url: str = None):
         existing_user = await self.user_repo.get_by_email(email)
         if existing_user:
             raise HTTPException(status_code=400, detail="Email already registered")
         
-        hashed_password = dependencies.hash_password(password)
+        hashed_password = await dependencies.hash_password_async(password)
         new_user = await self.user_repo.create(
             email=email, 
             name=name, 
@@ -296,35 +305,18 @@ class AuthService:
 
     async def generate_otp(self, user_id: int) -> str:
         """Generate a 6-digit OTP, store it, and return the code."""
-        
-        await self.db.execute(delete(OTPCode).where(OTPCode.user_id == user_id))
-
-        code = f"{random.randint(0, 999999):06d}"
-        otp = OTPCode(
-            user_id=user_id,
-            code=code,
-            expires_at=datetime.now(timezone.utc) + timedelta(minutes=5)
-        )
-        self.db.add(otp)
-        await self.db.commit()
-        return code
+        return await get_otp_store(self.db).issue(user_id)
 
     async def verify_otp(self, user_id: int, code: str):
         """Validate the OTP. Returns the User on success."""
-        stmt = select(OTPCode).where(OTPCode.user_id == user_id, OTPCode.code == code)
-        result = await self.db.execute(stmt)
-        otp = result.scalars().first()
+        outcome = await get_otp_store(self.db).verify(user_id, code)
 
-        if not otp:
-            raise HTTPException(status_code=401, detail="Invalid OTP code")
-
-        if otp.expires_at.replace(tzinfo=timezone.utc) < datetime.now(timezone.utc):
-            await self.db.execute(delete(OTPCode).where(OTPCode.user_id == user_id))
-            await self.db.commit()
+        if outcome == OTPResult.EXPIRED:
             raise HTTPException(status_code=401, detail="OTP has expired. Please login again.")
-
-        await self.db.execute(delete(OTPCode).where(OTPCode.user_id == user_id))
-        await self.db.commit()
+        if outcome == OTPResult.LOCKED:
+            raise HTTPException(status_code=401, detail="Too many invalid attempts. Please login again.")
+        if outcome != OTPResult.VALID:
+            raise HTTPException(status_code=401, detail="Invalid OTP code")
 
         db_user = await self.user_repo.get_by_id(user_id)
         if not db_user:
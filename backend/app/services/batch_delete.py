@@ -0,0 +1,24 @@
+import asyncio
+import time
+from typing import Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from ..core.config import settings
+
+
+async def delete_in_batches(conn: AsyncConnection, model, condition, deadline: float, batch_size: Optional[int] = None) -> int:
+    """DELETE rows matching `condition` one chunk at a time until none are left or the deadline passes."""
+    batch_size = batch_size or settings.maintenance_batch_size
+    removed = 0
+    while time.monotonic() < deadline:
+        chunk = select(model.id).where(condition).limit(batch_size).scalar_subquery()
+        # Repeating the condition outside the subquery lets Postgres prune partitions
+        result = await conn.execute(delete(model).where(condition, model.id.in_(chunk)))
+        await conn.commit()
+        removed += result.rowcount
+        if result.rowcount < batch_size:
+            break
+        await asyncio.sleep(0)
+    return removed
@@ -0,0 +1,185 @@
+"""Batched, bounded-queue writer for non-durable security events."""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import insert
+
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..models import SecurityEvent, EventType
+from . import location_enrichment
+from .websocket import security_ws_manager
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def event_payload(event_id: int, row: dict) -> dict:
+    """The websocket message for a stored event."""
+    event_type = row["event_type"]
+    return {
+        "id": event_id,
+        "event_type": event_type.value if hasattr(event_type, "value") else str(event_type),
+        "user_id": row["user_id"],
+        "ip_address": row["ip_address"],
+        "event_metadata": row["event_metadata"],
+        "created_at": row["created_at"].isoformat(),
+    }
+
+
+def enrich_if_pending(event_id: int, ip_address: str, event_metadata: Optional[dict], session_id: Optional[int] = None):
+    """Queue background location resolution for an event (and the login's session) stored with a "Pending" location."""
+    metadata = event_metadata or {}
+    if metadata.get("location") != location_enrichment.PENDING_LOCATION[0]:
+        return
+    location_enrichment.location_enrichment_worker.enqueue(location_enrichment.EnrichmentJob(
+        ip_address=ip_address,
+        lat=metadata.get("lat"),
+        lon=metadata.get("lon"),
+        session_id=session_id,
+        event_id=event_id,
+        event_metadata=dict(metadata),
+    ))
+
+
+class SecurityEventWriter:
+    def __init__(self, batch_size: int, flush_interval: float, max_queue: int, enqueue_timeout: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.overflow_writes = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Write everything queued, then stop the writer."""
+        if self.running:
+            await self._queue.put(None)
+            await self._task
+            return
+        if self._task is not None and not self._task.cancelled() and self._task.exception():
+            logger.error("security_event_writer_died", extra={"error": str(self._task.exception())})
+        # The loop is gone, so whatever it left behind is written here
+        items = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                items.append(item)
+        if items:
+            logger.warning("security_event_queue_drained_inline", extra={"queued": len(items)})
+            for i in range(0, len(items), self.batch_size):
+                await self._write(items[i:i + self.batch_size])
+
+    async def submit(self, event_type: EventType, ip_address: str, user_id: Optional[int], event_metadata: dict,
+                     session_id: Optional[int] = None) -> bool:
+        """Queue an event; returns False if it had to be written inline because the queue stayed full."""
+        row = {
+            "event_type": event_type,
+            "ip_address": ip_address,
+            "user_id": user_id,
+            "event_metadata": event_metadata,
+            "created_at": datetime.now(timezone.utc),
+        }
+        # (row, session_id): the session is only carried along for location enrichment
+        item = (row, session_id)
+        try:
+            await asyncio.wait_for(self._queue.put(item), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            self.overflow_writes += 1
+            logger.warning("security_event_queue_full", extra={"queued": self._queue.qsize()})
+            await self._write([item])
+            return False
+        self.enqueued += 1
+        return True
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._write(batch)
+
+    async def _write(self, items: list[tuple[dict, Optional[int]]]):
+        rows = [row for row, _ in items]
+        try:
+            ids = await self._insert(rows)
+        except Exception as e:
+            # Retry one by one so a single bad row does not take the batch down with it
+            logger.error("security_event_batch_failed", extra={"batch_size": len(rows), "error": str(e)}, exc_info=True)
+            ids = []
+            for row in rows:
+                try:
+                    ids.extend(await self._insert([row]))
+                except Exception as row_error:
+                    self.failed += 1
+                    ids.append(None)
+                    logger.error("security_event_write_failed", extra={"event_type": str(row["event_type"]), "error": str(row_error)})
+
+        self.batches += 1
+        for event_id, (row, session_id) in zip(ids, items):
+            if event_id is None:
+                continue
+            self.written += 1
+            enrich_if_pending(event_id, row["ip_address"], row["event_metadata"], session_id)
+            try:
+                await security_ws_manager.broadcast(event_payload(event_id, row))
+            except Exception as e:
+                logger.warning("ws_broadcast_failed", extra={"error": str(e)})
+
+    async def _insert(self, rows: list[dict]) -> list[int]:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                insert(SecurityEvent).returning(SecurityEvent.id, sort_by_parameter_order=True),
+                rows,
+            )
+            ids = list(result.scalars().all())
+            await db.commit()
+        return ids
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "overflow_writes": self.overflow_writes,
+            "failed": self.failed,
+        }
+
+
+security_event_writer = SecurityEventWriter(
+    batch_size=settings.event_writer_batch_size,
+    flush_interval=settings.event_writer_flush_interval_s,
+    max_queue=settings.event_writer_queue_size,
+    enqueue_timeout=settings.event_writer_enqueue_timeout_s,
+)
@@ -0,0 +1,207 @@
+"""Offline IP geolocation backed by a memory-mapped range table."""
+
+import argparse
+import csv
+import ipaddress
+import mmap
+import struct
+from typing import Iterable, Optional
+
+# File layout: header, IPv4 records, IPv6 records (each sorted by start), then the
+# deduplicated UTF-8 "City, Country" strings the records point into
+MAGIC = b"PSGEOIP1"
+HEADER = struct.Struct("<8sIIII")         # magic, ipv4 count, ipv6 count, strings offset, strings length
+V4_RECORD = struct.Struct("<IIIIff")      # start, end, name offset, name length, lat, lon
+V6_RECORD = struct.Struct("<16s16sIIff")  # as V4_RECORD with big-endian 16-byte addresses
+
+
+class GeoIPFormatError(ValueError):
+    pass
+
+
+class GeoIPDatabase:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise GeoIPFormatError(f"{path} is empty")
+
+        try:
+            self._read_header()
+        except GeoIPFormatError:
+            self.close()
+            raise
+
+    def _read_header(self):
+        size = len(self._mm)
+        if size < HEADER.size:
+            raise GeoIPFormatError(f"{self.path} is too short to be a GeoIP table")
+        magic, self.v4_count, self.v6_count, self._strings_offset, self._strings_len = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise GeoIPFormatError(f"{self.path} is not a GeoIP table (bad magic)")
+
+        # Every later read is an unchecked unpack_from at an offset derived from
+        # these fields, so the sections must lie inside the file and not overlap
+        self._v4_offset = HEADER.size
+        self._v6_offset = self._v4_offset + self.v4_count * V4_RECORD.size
+        records_end = self._v6_offset + self.v6_count * V6_RECORD.size
+        if records_end > size or self._strings_offset + self._strings_len > size:
+            raise GeoIPFormatError(f"{self.path} is truncated")
+        if self._strings_offset < records_end:
+            raise GeoIPFormatError(f"{self.path} has a string table overlapping its records")
+
+    def lookup(self, ip: str) -> Optional[dict]:
+        """Return {"location", "lat", "lon"} for `ip`, or None when no range covers it."""
+        try:
+            addr = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+
+        if addr.version == 4:
+            key, offset, count, record = int(addr), self._v4_offset, self.v4_count, V4_RECORD
+        else:
+            key, offset, count, record = addr.packed, self._v6_offset, self.v6_count, V6_RECORD
+
+        # Rightmost record whose start <= key
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = record.unpack_from(self._mm, offset + mid * record.size)[0]
+            if start <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0:
+            return None
+
+        _, end, name_offset, name_len, lat, lon = record.unpack_from(self._mm, offset + (lo - 1) * record.size)
+        if key > end:
+            return None
+
+        if name_offset + name_len > self._strings_len:
+            return None
+        name_start = self._strings_offset + name_offset
+        return {
+            "location": self._mm[name_start:name_start + name_len].decode("utf-8"),
+            "lat": round(lat, 4),
+            "lon": round(lon, 4),
+        }
+
+    def close(self):
+        if getattr(self, "_mm", None) is not None and not self._mm.closed:
+            self._mm.close()
+        self._file.close()
+
+
+def build_database(rows: Iterable[tuple], out_path: str) -> tuple[int, int]:
+    """
+    Write a range table from (start_ip, end_ip, location, lat, lon) rows.
+    Returns (ipv4 ranges, ipv6 ranges) written.
+    """
+    v4, v6 = [], []
+    strings = bytearray()
+    string_offsets: dict[str, int] = {}
+
+    for start_ip, end_ip, location, lat, lon in rows:
+        start, end = _parse_address(start_ip), _parse_address(end_ip)
+        if start.version != end.version:
+            raise GeoIPFormatError(f"Mixed address families in range {start_ip} - {end_ip}")
+        if int(start) > int(end):
+            start, end = end, start
+
+        if location not in string_offsets:
+            string_offsets[location] = len(strings)
+            strings.extend(location.encode("utf-8"))
+        name_offset = string_offsets[location]
+        name_len = len(location.encode("utf-8"))
+
+        if start.version == 4:
+            v4.append((int(start), int(end), name_offset, name_len, float(lat), float(lon)))
+        else:
+            v6.append((start.packed, end.packed, name_offset, name_len, float(lat), float(lon)))
+
+    v4.sort(key=lambda r: r[0])
+    v6.sort(key=lambda r: r[0])
+    strings_offset = HEADER.size + len(v4) * V4_RECORD.size + len(v6) * V6_RECORD.size
+
+    with open(out_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(v4), len(v6), strings_offset, len(strings)))
+        for rec in v4:
+            f.write(V4_RECORD.pack(*rec))
+        for rec in v6:
+            f.write(V6_RECORD.pack(*rec))
+        f.write(strings)
+
+    return len(v4), len(v6)
+
+
+def read_csv_ranges(csv_path: str) -> Iterable[tuple]:
+    """Yield (start_ip, end_ip, "City, Country", lat, lon) rows from a CSV range dump."""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        first = next(reader, None)
+        if first is None:
+            return
+
+        header = [col.strip().lower() for col in first]
+        if "start_ip" in header:
+            idx = {
+                "start": header.index("start_ip"),
+                "end": header.index("end_ip"),
+                "city": header.index("city"),
+                "country": header.index("country"),
+                "lat": header.index("lat") if "lat" in header else header.index("latitude"),
+                "lon": header.index("lon") if "lon" in header else header.index("longitude"),
+            }
+            rows = reader
+        else:
+            idx = {"start": 0, "end": 1, "country": 3, "city": 5, "lat": 6, "lon": 7}
+            rows = _chain_first(first, reader)
+
+        for row in rows:
+            if not row:
+                continue
+            city, country = row[idx["city"]].strip(), row[idx["country"]].strip()
+            location = f"{city}, {country}" if city else country
+            yield row[idx["start"]], row[idx["end"]], location, row[idx["lat"]] or 0, row[idx["lon"]] or 0
+
+
+def _chain_first(first, rest):
+    yield first
+    yield from rest
+
+
+def _parse_address(value: str):
+    # ip_address maps integers up to 2**32 - 1 to IPv4 and larger ones to IPv6
+    value = value.strip()
+    return ipaddress.ip_address(int(value) if value.isdigit() else value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline GeoIP range table tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Convert a CSV range dump into a binary range table")
+    build.add_argument("csv_path")
+    build.add_argument("out_path")
+
+    query = sub.add_parser("lookup", help="Look up addresses in a binary range table")
+    query.add_argument("db_path")
+    query.add_argument("ips", nargs="+")
+
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        v4_count, v6_count = build_database(read_csv_ranges(args.csv_path), args.out_path)
+        print(f"Wrote {v4_count} IPv4 and {v6_count} IPv6 ranges to {args.out_path}")
+    else:
+        db = GeoIPDatabase(args.db_path)
+        for ip in args.ips:
+            print(ip, db.lookup(ip))
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
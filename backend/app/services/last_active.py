@@ -0,0 +1,92 @@
+"""Write-behind buffer for `UserSession.last_active`."""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import update
+
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..models import UserSession
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class LastActiveBuffer:
+    def __init__(self, flush_interval: float, max_pending: int):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: dict[int, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self.touches = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.rows_written = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the periodic flush and write out whatever is pending."""
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    def touch(self, session_id: int, at: Optional[datetime] = None):
+        if session_id not in self._pending and len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._pending[session_id] = at or datetime.now(timezone.utc)
+        self.touches += 1
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("last_active_flush_failed", extra={"error": str(e)}, exc_info=True)
+
+    async def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        rows = [{"id": session_id, "last_active": at} for session_id, at in pending.items()]
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(UserSession), rows)
+            await db.commit()
+        self.flushes += 1
+        self.rows_written += len(rows)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "pending": len(self._pending),
+            "touches": self.touches,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+        }
+
+
+last_active_buffer = LastActiveBuffer(
+    flush_interval=settings.last_active_flush_interval_s,
+    max_pending=settings.last_active_max_pending,
+)
@@ -0,0 +1,159 @@
+"""Background location enrichment of "Pending" sessions and security events."""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Optional
+
+import httpx
+from sqlalchemy import update
+
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..models import SecurityEvent, UserSession
+from .location_service import LocationService
+from .websocket import security_ws_manager
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+
+PENDING_LOCATION = ("Pending", "Pending")
+
+
+@dataclass
+class EnrichmentJob:
+    ip_address: str
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    session_id: Optional[int] = None
+    event_id: Optional[int] = None
+    event_metadata: dict = field(default_factory=dict)
+
+
+class LocationEnrichmentWorker:
+    def __init__(self, batch_size: int, flush_interval: float, max_queue: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self.enqueued = 0
+        self.dropped = 0
+        self.patched_sessions = 0
+        self.patched_events = 0
+        self.batches = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, http_client: httpx.AsyncClient):
+        self._http_client = http_client
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush whatever is queued, then stop the worker."""
+        if not self.running:
+            return
+        await self._queue.put(None)
+        await self._task
+
+    def enqueue(self, job: EnrichmentJob) -> bool:
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            # The row keeps its "Pending" location; losing display data beats blocking logins
+            self.dropped += 1
+            logger.warning("location_enrichment_dropped", extra={"ip": job.ip_address})
+            return False
+        self.enqueued += 1
+        return True
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            job = await self._queue.get()
+            if job is None:
+                break
+            batch = [job]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    job = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                batch.append(job)
+
+            try:
+                await self._process(batch)
+            except Exception as e:
+                logger.error("location_enrichment_failed", extra={"batch_size": len(batch), "error": str(e)}, exc_info=True)
+
+    async def _process(self, batch: list[EnrichmentJob]):
+        # Jobs from the same client share one lookup (the location caches also dedupe)
+        keys = {(job.ip_address, job.lat, job.lon) for job in batch}
+        resolved = dict(zip(keys, await asyncio.gather(*(
+            LocationService.resolve_login_location(ip, lat, lon, self._http_client, budget_ms=settings.location_enrichment_timeout_ms)
+            for ip, lat, lon in keys
+        ))))
+
+        session_rows, event_rows, updates = [], [], []
+        for job in batch:
+            location_str, location_source = resolved[(job.ip_address, job.lat, job.lon)]
+            if job.session_id is not None:
+                session_rows.append({"id": job.session_id, "location": location_str})
+            if job.event_id is not None:
+                metadata = {**job.event_metadata, "location": location_str, "location_source": location_source}
+                event_rows.append({"id": job.event_id, "event_metadata": metadata})
+            updates.append({
+                "type": "location_update",
+                "session_id": job.session_id,
+                "event_id": job.event_id,
+                "location": location_str,
+                "location_source": location_source,
+            })
+
+        async with AsyncSessionLocal() as db:
+            if session_rows:
+                await db.execute(update(UserSession), session_rows)
+            if event_rows:
+                await db.execute(update(SecurityEvent), event_rows)
+            await db.commit()
+
+        self.batches += 1
+        self.patched_sessions += len(session_rows)
+        self.patched_events += len(event_rows)
+
+        for message in updates:
+            try:
+                await security_ws_manager.broadcast(message)
+            except Exception as e:
+                logger.warning("ws_broadcast_failed", extra={"error": str(e)})
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "patched_sessions": self.patched_sessions,
+            "patched_events": self.patched_events,
+        }
+
+
+location_enrichment_worker = LocationEnrichmentWorker(
+    batch_size=settings.location_enrichment_batch_size,
+    flush_interval=settings.location_enrichment_flush_interval_s,
+    max_queue=settings.location_enrichment_queue_size,
+)
+
+
+def is_deferred() -> bool:
+    return settings.location_enrichment == "deferred" and location_enrichment_worker.running
@@ -1,11 +1,139 @@
+import asyncio
+import ipaddress
 import httpx
+from ..core.cache import TTLCache, MISSING
+from ..core.config import settings
+from .geoip import GeoIPDatabase, GeoIPFormatError
+from .reverse_geocoder import ReverseGeocoder, load_reverse_geocoder
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+
+UNKNOWN_LOCATION = ("Unknown", "Unknown")
+UNKNOWN_IP_LOCATION = {"location": "Unknown Location", "lat": None, "lon": None}
+
+ip_location_cache = TTLCache(
+    max_entries=settings.ip_geo_cache_max_entries,
+    ttl=settings.ip_geo_cache_ttl_s
+)
+coord_location_cache = TTLCache(
+    max_entries=settings.coord_geo_cache_max_entries,
+    ttl=settings.coord_geo_cache_ttl_s
+)
+_lookups_inflight: dict[tuple, asyncio.Task] = {}
+
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def geohash(lat: float, lon: float, precision: int) -> str:
+    """Standard base32 geohash; nearby points share a cell at a given precision."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, ch, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            ch = (ch << 1) | 1
+            rng[0] = mid
+        else:
+            ch <<= 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_BASE32[ch])
+            bits, ch = 0, 0
+    return "".join(chars)
+
+async def _cached_lookup(cache: TTLCache, key, fetch, is_negative, negative_ttl: int):
+    """
+    Serve `key` from `cache`, otherwise run `fetch()` once for all concurrent
+    callers and cache the result (negative results for `negative_ttl` seconds).
+    """
+    cached = cache.get(key)
+    if cached is not MISSING:
+        return cached
+
+    inflight_key = (id(cache), key)
+    lookup = _lookups_inflight.get(inflight_key)
+    if lookup is None:
+        async def run():
+            result = await fetch()
+            cache.set(key, result, ttl=negative_ttl if is_negative(result) else None)
+            return result
+        lookup = asyncio.create_task(run())
+        _lookups_inflight[inflight_key] = lookup
+        lookup.add_done_callback(lambda _: _lookups_inflight.pop(inflight_key, None))
+    # Shielded so a caller hitting its latency budget does not abort the shared lookup
+    return await asyncio.shield(lookup)
+
+def _ip_cache_key(ip: str) -> str:
+    """Cache key for an IP: the address itself, or its /24 (IPv4) or /64 (IPv6) when prefix sharing is on."""
+    if not settings.ip_geo_cache_share_prefix:
+        return ip
+    try:
+        addr = ipaddress.ip_address(ip)
+    except ValueError:
+        return ip
+    prefix = 24 if addr.version == 4 else 64
+    return str(ipaddress.ip_network(f"{addr}/{prefix}", strict=False))
 
 class LocationService:
+    # Offline range table, set when geoip_provider is "local"
+    _geoip_db: GeoIPDatabase = None
+    # Offline centroid index, set when reverse_geocoder_provider is "local"
+    _reverse_geocoder: ReverseGeocoder = None
+
+    @staticmethod
+    def load_geoip_database(path: str) -> bool:
+        """Open the mmap'd range table; on failure keep using the remote provider."""
+        try:
+            db = GeoIPDatabase(path)
+        except (OSError, GeoIPFormatError) as e:
+            logger.error("geoip_load_failed", extra={"path": path, "error": str(e)})
+            return False
+        LocationService.close_geoip_database()
+        LocationService._geoip_db = db
+        logger.info("geoip_loaded", extra={"path": path, "ipv4_ranges": db.v4_count, "ipv6_ranges": db.v6_count})
+        return True
+
+    @staticmethod
+    def close_geoip_database():
+        if LocationService._geoip_db is not None:
+            LocationService._geoip_db.close()
+            LocationService._geoip_db = None
+
+    @staticmethod
+    async def load_reverse_geocoder(path: str) -> bool:
+        """Build the centroid index off the event loop; on failure keep using Nominatim."""
+        loop = asyncio.get_running_loop()
+        try:
+            geocoder = await loop.run_in_executor(None, load_reverse_geocoder, path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error("reverse_geocoder_load_failed", extra={"path": path, "error": str(e)})
+            return False
+        LocationService._reverse_geocoder = geocoder
+        logger.info("reverse_geocoder_loaded", extra={"path": path, "places": len(geocoder)})
+        return True
+
     @staticmethod
     async def get_ip_location_data(ip: str, client: httpx.AsyncClient) -> dict:
         if ip in ["127.0.0.1", "::1", "localhost", "0.0.0.0"]:
             return {"location": "Localhost (Testing)", "lat": 23.2156, "lon": 72.6369}
-        
+
+        if LocationService._geoip_db is not None:
+            return LocationService._geoip_db.lookup(ip) or dict(UNKNOWN_IP_LOCATION)
+
+        data = await _cached_lookup(
+            ip_location_cache,
+            _ip_cache_key(ip),
+            lambda: LocationService._fetch_ip_location_data(ip, client),
+            is_negative=lambda d: d["location"] == UNKNOWN_IP_LOCATION["location"],
+            negative_ttl=settings.ip_geo_cache_negative_ttl_s
+        )
+        return dict(data)
+
+    @staticmethod
+    async def _fetch_ip_location_data(ip: str, client: httpx.AsyncClient) -> dict:
         try:
             res = await client.get(f"http://ip-api.com/json/{ip}?fields=city,country,lat,lon,status")
             data = res.json()
@@ -17,10 +145,24 @@ class LocationService:
                 }
         except Exception as e:
             print(f"Location lookup failed: {e}")
-        return {"location": "Unknown Location", "lat": None, "lon": None}
+        return dict(UNKNOWN_IP_LOCATION)
 
     @staticmethod
     async def get_coord_location(lat: float, lon: float, client: httpx.AsyncClient) -> str:
+        if LocationService._reverse_geocoder is not None:
+            return LocationService._reverse_geocoder.lookup(lat, lon, settings.reverse_geocoder_max_km)
+
+        # Raw browser coordinates never repeat exactly; key on the surrounding geohash cell
+        return await _cached_lookup(
+            coord_location_cache,
+            geohash(lat, lon, settings.coord_geo_cache_precision),
+            lambda: LocationService._fetch_coord_location(lat, lon, client),
+            is_negative=lambda location: location is None,
+            negative_ttl=settings.coord_geo_cache_negative_ttl_s
+        )
+
+    @staticmethod
+    async def _fetch_coord_location(lat: float, lon: float, client: httpx.AsyncClient) -> str:
         try:
             headers = {"User-Agent": "SecurityApp/1.0"}
             res = await client.get(
@@ -32,10 +174,43 @@ class LocationService:
                 address = data.get("address", {})
                 city = address.get("city") or address.get("town") or address.get("village") or address.get("county")
                 country = address.get("country")
-                
+
                 if city and country:
                     return f"{city}, {country}"
         except Exception as e:
             print(f"Coordinate lookup failed: {e}")
-            
+
         return None
+
+    @staticmethod
+    async def _resolve_login_location(ip: str, lat: float, lon: float, client: httpx.AsyncClient) -> tuple[str, str]:
+        """Browser GPS first, falling back to IP geolocation."""
+        location_str = None
+        if lat and lon:
+            location_str = await LocationService.get_coord_location(lat, lon, client)
+            if location_str:
+                return location_str, "GPS (Precise)"
+
+        ip_data = await LocationService.get_ip_location_data(ip, client)
+        return ip_data["location"], "IP (Approximate)"
+
+    @staticmethod
+    async def resolve_login_location(ip: str, lat: float, lon: float, client: httpx.AsyncClient, budget_ms: int = None) -> tuple[str, str]:
+        """
+        Resolve (location, source) for a login within a hard latency budget.
+        Returns ("Unknown", "Unknown") when the lookups do not finish in time.
+        """
+        budget_ms = settings.location_budget_ms if budget_ms is None else budget_ms
+        try:
+            return await asyncio.wait_for(
+                LocationService._resolve_login_location(ip, lat, lon, client),
+                timeout=budget_ms / 1000
+            )
+        except asyncio.TimeoutError:
+            logger.warning("location_budget_exceeded", extra={"ip": ip, "budget_ms": budget_ms})
+            return UNKNOWN_LOCATION
+
+    @staticmethod
+    def start_login_location(ip: str, lat: float, lon: float, client: httpx.AsyncClient) -> asyncio.Task:
+        """Kick off location resolution so it runs alongside credential checks."""
+        return asyncio.create_task(LocationService.resolve_login_location(ip, lat, lon, client))
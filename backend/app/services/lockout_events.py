@@ -0,0 +1,152 @@
+"""One aggregated ACCOUNT_LOCKED event per IP instead of one per rejected request."""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+
+import httpx
+from sqlalchemy import select
+
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..models import EventType, User
+from . import location_enrichment
+from .location_service import LocationService
+from .security_service import SecurityService
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+
+MAX_SAMPLED_EMAILS = 20
+LOCATION_LOOKUP_CONCURRENCY = 20
+EMAIL_LOOKUP_CHUNK = 1000
+
+
+class LockoutEventRecorder:
+    def __init__(self, flush_interval: float, max_ips: int):
+        self.flush_interval = flush_interval
+        self.max_ips = max_ips
+        self._pending: dict[str, dict] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self.recorded = 0
+        self.dropped = 0
+        self.events_written = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, http_client: httpx.AsyncClient):
+        self._http_client = http_client
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the periodic flush and write out whatever has been counted."""
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    def record(self, ip_address: str, email: Optional[str], lat: Optional[float] = None, lon: Optional[float] = None):
+        now = datetime.now(timezone.utc)
+        entry = self._pending.get(ip_address)
+        if entry is None:
+            if len(self._pending) >= self.max_ips:
+                self.dropped += 1
+                return
+            entry = {"attempts": 0, "emails": {}, "first_seen": now, "lat": lat, "lon": lon}
+            self._pending[ip_address] = entry
+        entry["attempts"] += 1
+        entry["last_seen"] = now
+        if email and (email in entry["emails"] or len(entry["emails"]) < MAX_SAMPLED_EMAILS):
+            entry["emails"][email] = entry["emails"].get(email, 0) + 1
+        self.recorded += 1
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("lockout_event_flush_failed", extra={"error": str(e)}, exc_info=True)
+
+    async def _locations(self, pending: dict[str, dict]) -> dict[str, tuple[str, str]]:
+        if location_enrichment.is_deferred() or self._http_client is None:
+            # A "Pending" location is picked up for enrichment once the event is written
+            return {ip_address: location_enrichment.PENDING_LOCATION for ip_address in pending}
+
+        limit = asyncio.Semaphore(LOCATION_LOOKUP_CONCURRENCY)
+
+        async def resolve(ip_address: str, entry: dict) -> tuple[str, str]:
+            async with limit:
+                return await LocationService.resolve_login_location(ip_address, entry["lat"], entry["lon"], self._http_client)
+
+        resolved = await asyncio.gather(*(resolve(ip, entry) for ip, entry in pending.items()))
+        return dict(zip(pending, resolved))
+
+    async def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        locations = await self._locations(pending)
+
+        async with AsyncSessionLocal() as db:
+            emails = sorted({email for entry in pending.values() for email in entry["emails"]})
+            user_ids = {}
+            # Chunked to stay under the driver's bind parameter limit
+            for i in range(0, len(emails), EMAIL_LOOKUP_CHUNK):
+                result = await db.execute(select(User.email, User.id).where(User.email.in_(emails[i:i + EMAIL_LOOKUP_CHUNK])))
+                user_ids.update(result.all())
+
+            for ip_address, entry in pending.items():
+                location_str, location_source = locations[ip_address]
+                base = {
+                    "reason": "Too many failed attempts",
+                    "first_seen": entry["first_seen"].isoformat(),
+                    "last_seen": entry["last_seen"].isoformat(),
+                    "location": location_str,
+                    "location_source": location_source,
+                    "lat": entry["lat"],
+                    "lon": entry["lon"],
+                }
+                # One event per targeted account so it shows up in that user's own history
+                unattributed = entry["attempts"]
+                unknown = []
+                for email, attempts in sorted(entry["emails"].items()):
+                    if email not in user_ids:
+                        unknown.append(email)
+                        continue
+                    unattributed -= attempts
+                    await self._write(db, ip_address, user_ids[email], {
+                        **base, "targeted_email": email, "targeted_emails": [email], "blocked_attempts": attempts,
+                    })
+                if unattributed > 0:
+                    await self._write(db, ip_address, None, {
+                        **base,
+                        "targeted_email": unknown[0] if len(unknown) == 1 else None,
+                        "targeted_emails": unknown,
+                        "blocked_attempts": unattributed,
+                    })
+
+    async def _write(self, db, ip_address: str, user_id: Optional[int], metadata: dict):
+        await SecurityService.log_event(db, EventType.ACCOUNT_LOCKED, ip_address, user_id=user_id, event_metadata=metadata)
+        self.events_written += 1
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "pending_ips": len(self._pending),
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "events_written": self.events_written,
+        }
+
+
+lockout_events = LockoutEventRecorder(
+    flush_interval=settings.lockout_flush_interval_s,
+    max_ips=settings.lockout_max_pending_ips,
+)
@@ -0,0 +1,95 @@
+"""Brute-force lockout for password logins, from a window of recent failures per key."""
+
+import json
+import math
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.cache import TTLCache, MISSING
+from ..core.config import settings
+from .security_service import SecurityService
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+
+LOCKED_OUT_DETAIL = "Too many failed login attempts. Please try again in 5 minutes."
+_LOCKED_OUT_BODY = json.dumps({"detail": LOCKED_OUT_DETAIL}).encode("utf-8")
+
+
+class LoginLimiter:
+    def __init__(self, window: float, ip_threshold: int, email_threshold: int, max_keys: int, clock=time.time):
+        self.window = window
+        self.ip_threshold = ip_threshold
+        # 0 disables per-email lockout; it lets anyone lock a victim out of their account
+        self.email_threshold = email_threshold
+        self._clock = clock
+        self._failures = TTLCache(max_entries=max_keys, ttl=window, clock=clock)
+
+    def _keys(self, ip_address: str, email: Optional[str]) -> list[tuple[tuple[str, str], int]]:
+        keys = [(("ip", ip_address), self.ip_threshold)]
+        if email and self.email_threshold > 0:
+            keys.append((("email", email.lower()), self.email_threshold))
+        return keys
+
+    def retry_after(self, ip_address: str, email: Optional[str] = None) -> float:
+        """Seconds until the IP (or email) may try again; 0 when not locked."""
+        now = self._clock()
+        wait = 0.0
+        for key, threshold in self._keys(ip_address, email):
+            failures = self._failures.get(key)
+            if failures is MISSING or len(failures) < threshold:
+                continue
+            wait = max(wait, failures[0] + self.window - now)
+        return wait
+
+    def is_locked(self, ip_address: str, email: Optional[str] = None) -> bool:
+        return self.retry_after(ip_address, email) > 0
+
+    def locked_response(self, ip_address: str, email: Optional[str] = None) -> Optional[Response]:
+        """The 429 for a locked-out client, or None when it may proceed."""
+        wait = self.retry_after(ip_address, email)
+        if wait <= 0:
+            return None
+        return Response(
+            content=_LOCKED_OUT_BODY,
+            status_code=429,
+            media_type="application/json",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+    def record_failure(self, ip_address: str, email: Optional[str] = None, at: Optional[float] = None):
+        at = self._clock() if at is None else at
+        for key, threshold in self._keys(ip_address, email):
+            failures = self._failures.get(key)
+            if failures is MISSING:
+                failures = deque(maxlen=threshold)
+            failures.append(at)
+            self._failures.set(key, failures, ttl=at + self.window - self._clock())
+
+    async def rebuild(self, db: AsyncSession):
+        """Replay FAILED_LOGIN events from the last window, e.g. after a restart."""
+        self._failures.clear()
+        since = datetime.now(timezone.utc) - timedelta(seconds=self.window)
+        rows = await SecurityService.recent_failed_logins(db, since)
+        for ip_address, email, created_at in rows:
+            self.record_failure(ip_address, email, at=created_at.timestamp())
+        logger.info("login_limiter_rebuilt", extra={"events": len(rows), "keys": len(self._failures)})
+
+    def clear(self):
+        self._failures.clear()
+
+    def stats(self) -> dict:
+        return {**self._failures.stats(), "window_s": self.window}
+
+
+login_limiter = LoginLimiter(
+    window=settings.login_lockout_window_s,
+    ip_threshold=settings.login_lockout_ip_failures,
+    email_threshold=settings.login_lockout_email_failures,
+    max_keys=settings.login_limiter_max_keys,
+)
@@ -0,0 +1,209 @@
+"""Periodic database housekeeping, run by one worker at a time under an advisory lock."""
+
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from ..core.config import settings
+from ..core.database import engine
+from ..models import OTPCode, UserSession
+from .batch_delete import delete_in_batches
+from .partitions import prepare_partitions, security_event_retention
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+
+# Arbitrary application-wide key for pg_try_advisory_lock ("PSMAINT" in ASCII)
+MAINTENANCE_LOCK_KEY = 0x50534D41494E54
+
+# (connection, monotonic deadline) -> rows removed
+JobFunc = Callable[[AsyncConnection, float], Awaitable[int]]
+
+
+@dataclass
+class MaintenanceJob:
+    name: str
+    run: JobFunc
+
+
+async def purge_expired_otp_codes(conn: AsyncConnection, deadline: float) -> int:
+    return await delete_in_batches(conn, OTPCode, OTPCode.expires_at < datetime.now(timezone.utc), deadline)
+
+
+async def purge_expired_sessions(conn: AsyncConnection, deadline: float) -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.refresh_token_expire_days + settings.session_retention_days)
+    return await delete_in_batches(conn, UserSession, UserSession.created_at < cutoff, deadline)
+
+
+@asynccontextmanager
+async def maintenance_lock(conn: AsyncConnection, wait: bool = False):
+    """Hold the maintenance advisory lock on `conn`; yields False without it if another worker has it and `wait` is off."""
+    if wait:
+        await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+        locked = True
+    else:
+        locked = (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY})).scalar()
+    await conn.commit()
+    try:
+        yield locked
+    finally:
+        if locked:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+            await conn.commit()
+
+
+class MaintenanceScheduler:
+    def __init__(self, interval: float, jitter: float, time_budget: float):
+        self.interval = interval
+        self.jitter = jitter
+        self.time_budget = time_budget
+        self.jobs: list[MaintenanceJob] = []
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.skipped = 0
+        self.rows_removed: dict[str, int] = {}
+        self.last_run: Optional[dict] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def register(self, name: str, run: JobFunc):
+        self.jobs.append(MaintenanceJob(name, run))
+        self.rows_removed.setdefault(name, 0)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval + random.uniform(0, self.jitter))
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error("maintenance_run_failed", extra={"error": str(e)}, exc_info=True)
+
+    async def run_once(self) -> Optional[dict]:
+        """Run every job once if this worker wins the advisory lock; returns rows removed per job."""
+        async with engine.connect() as conn:
+            # Advisory locks belong to the connection, so jobs run on this same one
+            async with maintenance_lock(conn) as locked:
+                if not locked:
+                    self.skipped += 1
+                    return None
+                return await self._run_jobs(conn)
+
+    async def _run_jobs(self, conn: AsyncConnection) -> dict:
+        started = time.monotonic()
+        deadline = started + self.time_budget
+        removed = {}
+        for job in self.jobs:
+            if time.monotonic() >= deadline:
+                break
+            try:
+                removed[job.name] = await job.run(conn, deadline)
+            except Exception as e:
+                await conn.rollback()
+                logger.error("maintenance_job_failed", extra={"job": job.name, "error": str(e)}, exc_info=True)
+                continue
+            self.rows_removed[job.name] += removed[job.name]
+
+        self.runs += 1
+        self.last_run = {
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round((time.monotonic() - started) * 1000, 2),
+            "rows_removed": removed,
+            "out_of_time": time.monotonic() >= deadline,
+        }
+        logger.info("maintenance_run", extra=self.last_run)
+        return removed
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "runs": self.runs,
+            "skipped_lock_held": self.skipped,
+            "rows_removed": dict(self.rows_removed),
+            "last_run": self.last_run,
+        }
+
+
+class PartitionMaintainer:
+    """Creates upcoming security_events partitions on every worker, outside the maintenance schedule and budget."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.created = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error("partition_check_failed", extra={"error": str(e)}, exc_info=True)
+
+    async def run_once(self) -> list[str]:
+        """Create any missing partitions for the current and upcoming periods; returns the names created."""
+        async with engine.connect() as conn:
+            # Waits out a maintenance round rather than skipping: rows have nowhere
+            # to go once the pre-created partitions run out
+            async with maintenance_lock(conn, wait=True):
+                created = await prepare_partitions(conn)
+        self.runs += 1
+        self.created += len(created)
+        return created
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "runs": self.runs,
+            "partitions_created": self.created,
+            "last_error": self.last_error,
+        }
+
+
+maintenance_scheduler = MaintenanceScheduler(
+    interval=settings.maintenance_interval_s,
+    jitter=settings.maintenance_jitter_s,
+    time_budget=settings.maintenance_time_budget_s,
+)
+maintenance_scheduler.register("otp_codes", purge_expired_otp_codes)
+maintenance_scheduler.register("user_sessions", purge_expired_sessions)
+maintenance_scheduler.register("security_events", security_event_retention)
+
+partition_maintainer = PartitionMaintainer(interval=settings.security_event_partition_check_interval_s)
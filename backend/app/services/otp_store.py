@@ -0,0 +1,135 @@
+"""Short-lived email 2FA codes, kept in the database or in a per-process cache."""
+
+import hmac
+import secrets
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.cache import TTLCache, MISSING
+from ..core.config import settings
+from ..models import OTPCode
+
+
+class OTPResult(str, Enum):
+    VALID = "valid"
+    INVALID = "invalid"
+    EXPIRED = "expired"
+    LOCKED = "locked"
+
+
+def generate_code() -> str:
+    return f"{secrets.randbelow(1_000_000):06d}"
+
+
+class OTPStore(ABC):
+    @abstractmethod
+    async def issue(self, user_id: int) -> str:
+        """Replace any outstanding code for the user with a fresh one and return it."""
+
+    @abstractmethod
+    async def verify(self, user_id: int, code: str) -> OTPResult:
+        """Check a code; a VALID result consumes it."""
+
+
+class MemoryOTPStore(OTPStore):
+    def __init__(self, ttl: float, max_attempts: int, max_entries: int):
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        # user_id -> [code, failed attempts, expires_at]; cached for twice the code's
+        # lifetime so a late attempt gets EXPIRED rather than INVALID, as with the database
+        self._codes = TTLCache(max_entries=max_entries, ttl=ttl * 2)
+
+    async def issue(self, user_id: int) -> str:
+        code = generate_code()
+        self._codes.set(user_id, [code, 0, self._codes._clock() + self.ttl])
+        return code
+
+    async def verify(self, user_id: int, code: str) -> OTPResult:
+        entry = self._codes.get(user_id)
+        if entry is MISSING:
+            return OTPResult.INVALID
+        if self._codes._clock() >= entry[2]:
+            self._codes.invalidate(user_id)
+            return OTPResult.EXPIRED
+        if hmac.compare_digest(entry[0], code):
+            self._codes.invalidate(user_id)
+            return OTPResult.VALID
+        entry[1] += 1
+        if entry[1] >= self.max_attempts:
+            self._codes.invalidate(user_id)
+            return OTPResult.LOCKED
+        return OTPResult.INVALID
+
+    def stats(self) -> dict:
+        return self._codes.stats()
+
+
+class DatabaseOTPStore(OTPStore):
+    def __init__(self, db: AsyncSession, ttl: float, max_attempts: int):
+        self.db = db
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+
+    async def issue(self, user_id: int) -> str:
+        code = generate_code()
+        await self.db.execute(delete(OTPCode).where(OTPCode.user_id == user_id))
+        self.db.add(OTPCode(
+            user_id=user_id,
+            code=code,
+            expires_at=datetime.now(timezone.utc) + timedelta(seconds=self.ttl),
+        ))
+        await self.db.commit()
+        return code
+
+    async def verify(self, user_id: int, code: str) -> OTPResult:
+        now = datetime.now(timezone.utc)
+        # Consuming the code is a single statement, so two concurrent verifies cannot both succeed
+        result = await self.db.execute(
+            delete(OTPCode)
+            .where(OTPCode.user_id == user_id, OTPCode.code == code, OTPCode.expires_at >= now)
+            .returning(OTPCode.id)
+        )
+        if result.first():
+            await self.db.commit()
+            return OTPResult.VALID
+
+        result = await self.db.execute(
+            update(OTPCode)
+            .where(OTPCode.user_id == user_id)
+            .values(attempts=OTPCode.attempts + 1)
+            .returning(OTPCode.attempts, OTPCode.expires_at)
+        )
+        row = result.first()
+        if not row:
+            await self.db.rollback()
+            return OTPResult.INVALID
+
+        attempts, expires_at = row
+        if expires_at.replace(tzinfo=timezone.utc) < now:
+            outcome = OTPResult.EXPIRED
+        elif attempts >= self.max_attempts:
+            outcome = OTPResult.LOCKED
+        else:
+            await self.db.commit()
+            return OTPResult.INVALID
+
+        await self.db.execute(delete(OTPCode).where(OTPCode.user_id == user_id))
+        await self.db.commit()
+        return outcome
+
+
+memory_otp_store = MemoryOTPStore(
+    ttl=settings.otp_ttl_s,
+    max_attempts=settings.otp_max_attempts,
+    max_entries=settings.otp_memory_max_entries,
+)
+
+
+def get_otp_store(db: AsyncSession) -> OTPStore:
+    if settings.otp_store == "memory":
+        return memory_otp_store
+    return DatabaseOTPStore(db, ttl=settings.otp_ttl_s, max_attempts=settings.otp_max_attempts)
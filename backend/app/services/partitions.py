@@ -0,0 +1,134 @@
+"""Creation and retention of the weekly/daily range partitions of `security_events`."""
+
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from ..core.config import settings
+from ..models import SecurityEvent
+from .batch_delete import delete_in_batches
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+
+PARENT = SecurityEvent.__tablename__
+_BOUND_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def period_start(at: datetime, interval: str) -> datetime:
+    start = at.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == "week":
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def period_length(interval: str) -> timedelta:
+    return timedelta(weeks=1) if interval == "week" else timedelta(days=1)
+
+
+def partition_name(start: datetime) -> str:
+    return f"{PARENT}_p{start:%Y%m%d}"
+
+
+def _parse_bound(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    result = await conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:parent)"),
+        {"parent": PARENT},
+    )
+    return result.scalar() is not None
+
+
+async def list_partitions(conn: AsyncConnection) -> list[tuple[str, datetime, datetime, bool]]:
+    """(name, lower, upper, detach pending) of every range partition, ordered by lower bound."""
+    result = await conn.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), i.inhdetachpending "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:parent)"
+    ), {"parent": PARENT})
+    partitions = []
+    for name, bound, detach_pending in result.all():
+        match = _BOUND_RE.search(bound or "")
+        if match:
+            partitions.append((name, _parse_bound(match.group(1)), _parse_bound(match.group(2)), bool(detach_pending)))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+async def ensure_future_partitions(conn: AsyncConnection, interval: str, ahead: int, now: datetime = None) -> list[str]:
+    """Create the current and next `ahead` period partitions; returns the names created."""
+    now = now or datetime.now(timezone.utc)
+    existing = [(lower, upper) for _, lower, upper, _ in await list_partitions(conn)]
+    step = period_length(interval)
+    start = period_start(now, interval)
+    created = []
+    for _ in range(ahead + 1):
+        end = start + step
+        # Skip periods already covered, e.g. by weekly partitions after switching to daily
+        if not any(lower < end and start < upper for lower, upper in existing):
+            name = partition_name(start)
+            try:
+                await conn.execute(text(
+                    f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{PARENT}" '
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                ))
+                await conn.commit()
+            except Exception as e:
+                await conn.rollback()
+                logger.error("partition_create_failed", extra={"partition": name, "error": str(e)})
+            else:
+                existing.append((start, end))
+                created.append(name)
+                logger.info("partition_created", extra={"partition": name})
+        start = end
+    return created
+
+
+async def drop_expired_partitions(conn: AsyncConnection, cutoff: datetime, deadline: float) -> int:
+    """Detach and drop partitions whose upper bound is at or before `cutoff`; returns the (estimated) rows removed."""
+    removed = 0
+    for name, _, upper, detach_pending in await list_partitions(conn):
+        if upper > cutoff or time.monotonic() >= deadline:
+            break
+        rows = (await conn.execute(
+            text("SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+            {"name": name},
+        )).scalar() or 0
+        await conn.commit()
+        # DROP on an attached partition locks the whole parent; a concurrent detach only
+        # waits for queries already using the partition. It cannot run in a transaction.
+        default_isolation = conn.default_isolation_level
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            mode = "FINALIZE" if detach_pending else "CONCURRENTLY"
+            await conn.execute(text(f'ALTER TABLE "{PARENT}" DETACH PARTITION "{name}" {mode}'))
+        finally:
+            await conn.execution_options(isolation_level=default_isolation)
+        await conn.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+        await conn.commit()
+        removed += rows
+        logger.info("partition_dropped", extra={"partition": name, "rows": rows})
+    return removed
+
+
+async def prepare_partitions(conn: AsyncConnection) -> list[str]:
+    """Make sure the current and upcoming periods have partitions; returns the names created."""
+    if not await is_partitioned(conn):
+        return []
+    return await ensure_future_partitions(conn, settings.security_event_partition_interval, settings.security_event_partitions_ahead)
+
+
+async def security_event_retention(conn: AsyncConnection, deadline: float) -> int:
+    """Maintenance job: enforce event retention; returns rows removed."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.security_event_retention_days)
+    removed = 0
+    if await is_partitioned(conn):
+        removed += await drop_expired_partitions(conn, cutoff, deadline)
+    # Whatever is left before the cutoff lives in the partition that straddles it
+    return removed + await delete_in_batches(conn, SecurityEvent, SecurityEvent.created_at < cutoff, deadline)
@@ -0,0 +1,102 @@
+"""Offline reverse geocoding over a city centroid dataset."""
+
+import csv
+import math
+from typing import Optional
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _to_xyz(lat: float, lon: float) -> tuple[float, float, float]:
+    phi, lam = math.radians(lat), math.radians(lon)
+    cos_phi = math.cos(phi)
+    return (cos_phi * math.cos(lam), cos_phi * math.sin(lam), math.sin(phi))
+
+
+def _chord_to_km(chord: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+class ReverseGeocoder:
+    def __init__(self, places: list[tuple[str, str, float, float]]):
+        """`places` is a list of (name, country, lat, lon)."""
+        self._labels = [f"{name}, {country}" for name, country, _, _ in places]
+        self._points = [_to_xyz(lat, lon) for _, _, lat, lon in places]
+        # Implicit tree: node -> (point index, split axis, left node, right node)
+        self._nodes: list[tuple[int, int, int, int]] = []
+        self._root = self._build(list(range(len(self._points))), 0)
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _build(self, indices: list[int], depth: int) -> int:
+        if not indices:
+            return -1
+        axis = depth % 3
+        indices.sort(key=lambda i: self._points[i][axis])
+        mid = len(indices) // 2
+        node = len(self._nodes)
+        self._nodes.append(None)
+        left = self._build(indices[:mid], depth + 1)
+        right = self._build(indices[mid + 1:], depth + 1)
+        self._nodes[node] = (indices[mid], axis, left, right)
+        return node
+
+    def nearest(self, lat: float, lon: float) -> Optional[tuple[str, float]]:
+        """Return ("City, Country", distance_km) of the closest centroid."""
+        if self._root < 0:
+            return None
+        target = _to_xyz(lat, lon)
+        best_idx, best_d2 = -1, math.inf
+
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node < 0:
+                continue
+            idx, axis, left, right = self._nodes[node]
+            point = self._points[idx]
+            d2 = (point[0] - target[0]) ** 2 + (point[1] - target[1]) ** 2 + (point[2] - target[2]) ** 2
+            if d2 < best_d2:
+                best_idx, best_d2 = idx, d2
+
+            diff = target[axis] - point[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            # Visit the far side only if the splitting plane is closer than the best match
+            if diff * diff < best_d2:
+                stack.append(far)
+            stack.append(near)
+
+        return self._labels[best_idx], _chord_to_km(math.sqrt(best_d2))
+
+    def lookup(self, lat: float, lon: float, max_km: float) -> Optional[str]:
+        """"City, Country" for the coordinates, or None when nothing is within `max_km`."""
+        match = self.nearest(lat, lon)
+        if not match or match[1] > max_km:
+            return None
+        return match[0]
+
+
+def load_places(path: str) -> list[tuple[str, str, float, float]]:
+    if path.endswith(".txt"):
+        return _load_geonames(path)
+    places = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            places.append((row["name"], row["country"], float(row["lat"]), float(row["lon"])))
+    return places
+
+
+def _load_geonames(path: str) -> list[tuple[str, str, float, float]]:
+    places = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) < 9:
+                continue
+            places.append((cols[1], cols[8], float(cols[4]), float(cols[5])))
+    return places
+
+
+def load_reverse_geocoder(path: str) -> ReverseGeocoder:
+    return ReverseGeocoder(load_places(path))
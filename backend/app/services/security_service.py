@@ -1,8 +1,9 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
 from datetime import datetime, timedelta, timezone
 from ..models import SecurityEvent, EventType
 from .websocket import security_ws_manager
+from .event_writer import security_event_writer, event_payload, enrich_if_pending
 from ..logger import get_logger
 
 logger = get_logger(__name__)
@@ -13,10 +14,21 @@ class SecurityService:
                         event_type: EventType, 
                         ip_address: str, 
                         user_id: int = None, 
-                        event_metadata: dict = None):
-        """Creates a new security log entry asynchronously."""
+                        event_metadata: dict = None,
+                        durable: bool = False,
+                        session_id: int = None):
+        """
+        Record a security event. By default it is queued for the batched writer and
+        None is returned; `durable=True` commits it before returning the row.
+        `session_id` names a session row with the same pending location, so a single
+        enrichment job resolves both.
+        """
         if event_metadata is None:
             event_metadata = {}
+
+        if not durable and security_event_writer.running:
+            await security_event_writer.submit(event_type, ip_address, user_id, event_metadata, session_id)
+            return None
             
         new_event = SecurityEvent(
             user_id=user_id,
@@ -27,38 +39,34 @@ class SecurityService:
         db.add(new_event)
         await db.commit()
         await db.refresh(new_event)
+        enrich_if_pending(new_event.id, new_event.ip_address, new_event.event_metadata, session_id)
 
         try:
-            event_type_str = new_event.event_type.value if hasattr(new_event.event_type, 'value') else str(new_event.event_type)
-
-            event_payload = {
-                "id": new_event.id,
-                "event_type": event_type_str,
+            await security_ws_manager.broadcast(event_payload(new_event.id, {
+                "event_type": new_event.event_type,
                 "user_id": new_event.user_id,
                 "ip_address": new_event.ip_address,
                 "event_metadata": new_event.event_metadata,
-                "created_at": new_event.created_at.isoformat()
-            }
-            await security_ws_manager.broadcast(event_payload)
+                "created_at": new_event.created_at,
+            }))
         
         except Exception as e:
             logger.warning("ws_broadcast_failed", extra={"error": str(e)})
         return new_event
 
     @staticmethod
-    async def is_ip_locked_out(db: AsyncSession, ip_address: str) -> bool:
-        """Rule: >5 failed attempts in the last 5 minutes from the same IP."""
-        five_mins_ago = datetime.now(timezone.utc) - timedelta(minutes=5)
-        
-        stmt = select(func.count(SecurityEvent.id)).where(
-            SecurityEvent.ip_address == ip_address,
+    async def recent_failed_logins(db: AsyncSession, since: datetime) -> list[tuple[str, str, datetime]]:
+        """(ip_address, attempted_email, created_at) of FAILED_LOGIN events since `since`, oldest first."""
+        stmt = select(
+            SecurityEvent.ip_address,
+            SecurityEvent.event_metadata["attempted_email"].as_string(),
+            SecurityEvent.created_at
+        ).where(
             SecurityEvent.event_type == EventType.FAILED_LOGIN,
-            SecurityEvent.created_at >= five_mins_ago
-        )
+            SecurityEvent.created_at >= since
+        ).order_by(SecurityEvent.created_at)
         result = await db.execute(stmt)
-        failed_count = result.scalar()
-        
-        return failed_count >= 5
+        return [tuple(row) for row in result.all()]
 
     @staticmethod
     async def check_suspicious_activity(db: AsyncSession, 
@@ -0,0 +1,71 @@
+"""
+Compare the offline reverse geocoder with the Nominatim HTTP path.
+
+    python bench_reverse_geocoder.py                      # local index only
+    python bench_reverse_geocoder.py --http 5             # also 5 Nominatim calls (1 req/s policy)
+    python bench_reverse_geocoder.py --dataset cities15000.txt
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+import httpx
+
+from app.services.reverse_geocoder import load_reverse_geocoder
+
+DEFAULT_DATASET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cities.csv")
+
+
+def summarize(label: str, timings_ms: list[float]):
+    timings_ms = sorted(timings_ms)
+    p99 = timings_ms[min(len(timings_ms) - 1, int(len(timings_ms) * 0.99))]
+    print(f"{label:<10} n={len(timings_ms):<7} mean={statistics.mean(timings_ms):.4f}ms "
+          f"p50={statistics.median(timings_ms):.4f}ms p99={p99:.4f}ms")
+
+
+def random_points(n: int) -> list[tuple[float, float]]:
+    rng = random.Random(42)
+    return [(rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in range(n)]
+
+
+async def bench_http(points: list[tuple[float, float]]) -> list[float]:
+    timings = []
+    async with httpx.AsyncClient(timeout=20.0) as client:
+        for lat, lon in points:
+            start = time.perf_counter()
+            await client.get(
+                f"https://nominatim.openstreetmap.org/reverse?format=json&lat={lat}&lon={lon}",
+                headers={"User-Agent": "SecurityApp/1.0"}
+            )
+            timings.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(1)  # Nominatim usage policy: max 1 request per second
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dataset", default=DEFAULT_DATASET)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--http", type=int, default=0, help="Number of Nominatim calls to time")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    geocoder = load_reverse_geocoder(args.dataset)
+    print(f"Loaded {len(geocoder)} places in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    timings = []
+    for lat, lon in random_points(args.lookups):
+        start = time.perf_counter()
+        geocoder.nearest(lat, lon)
+        timings.append((time.perf_counter() - start) * 1000)
+    summarize("local", timings)
+
+    if args.http:
+        summarize("nominatim", asyncio.run(bench_http(random_points(args.http))))
+
+
+if __name__ == "__main__":
+    main()
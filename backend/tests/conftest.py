@@ -0,0 +1,24 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def session_local(mocker):
+    """Patch `AsyncSessionLocal` in the given module and return the session it yields"""
+    def patch(module):
+        session = AsyncMock()
+        session.__aenter__.return_value = session
+        session.add = MagicMock()
+        mocker.patch(f"{module}.AsyncSessionLocal", MagicMock(return_value=session))
+        return session
+    return patch
@@ -0,0 +1,36 @@
+from app.core.cache import TTLCache, MISSING
+
+def test_entries_expire_after_ttl(clock):
+    """Test entries are served until their TTL and counted as expired afterwards"""
+    cache = TTLCache(max_entries=10, ttl=60, clock=clock)
+    cache.set("8.8.8.8", "London, United Kingdom")
+
+    clock.now += 59
+    assert cache.get("8.8.8.8") == "London, United Kingdom"
+
+    clock.now += 2
+    assert cache.get("8.8.8.8") is MISSING
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_ttl_override_for_negative_results(clock):
+    """Test a per-entry TTL overrides the default lifetime"""
+    cache = TTLCache(max_entries=10, ttl=3600, clock=clock)
+    cache.set("10.0.0.1", None, ttl=5)
+
+    clock.now += 6
+    assert cache.get("10.0.0.1", "fallback") == "fallback"
+
+def test_least_recently_used_entry_is_evicted():
+    """Test the bound evicts the least recently used entry first"""
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
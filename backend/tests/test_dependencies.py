@@ -0,0 +1,151 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.core import dependencies
+from app.core.session_state import session_state_cache, verified_token_cache
+
+@pytest.fixture(autouse=True)
+def clear_session_cache():
+    session_state_cache.clear()
+    verified_token_cache.clear()
+    yield
+    session_state_cache.clear()
+    verified_token_cache.clear()
+
+def _db_returning(is_active):
+    result = MagicMock()
+    result.scalar.return_value = is_active
+    db = AsyncMock()
+    db.execute.return_value = result
+    return db
+
+def _credentials(session_id):
+    token = dependencies.create_jwt_token("test@example.com", "Test User", session_id)
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+@pytest.mark.asyncio
+async def test_session_state_is_cached_between_requests():
+    """Test repeated requests on one session cost a single session lookup"""
+    db = _db_returning(True)
+
+    for _ in range(3):
+        payload = await dependencies.get_current_user(None, _credentials(42), db)
+        assert payload["sub"] == "test@example.com"
+
+    assert db.execute.await_count == 1
+
+@pytest.mark.asyncio
+async def test_revocation_hook_takes_effect_immediately():
+    """Test mark_revoked rejects the next request without a database read"""
+    db = _db_returning(True)
+    await dependencies.get_current_user(None, _credentials(42), db)
+
+    session_state_cache.mark_revoked(42)
+
+    with pytest.raises(HTTPException) as exc:
+        await dependencies.get_current_user(None, _credentials(42), db)
+    assert exc.value.status_code == 401
+    assert db.execute.await_count == 1
+
+@pytest.mark.asyncio
+async def test_generation_bump_revokes_outstanding_tokens():
+    """Test a token minted before a generation bump is rejected afterwards"""
+    from app.core.session_state import token_generation_cache
+    token_generation_cache.clear()
+    token = dependencies.create_jwt_token("test@example.com", "Test User", None, user_id=7, generation=0)
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    db = _db_returning(0)
+
+    assert (await dependencies.get_current_user(None, credentials, db))["gen"] == 0
+
+    token_generation_cache.set(7, 1)
+    with pytest.raises(HTTPException) as exc:
+        await dependencies.get_current_user(None, credentials, db)
+    assert exc.value.detail == "Token revoked"
+    assert db.execute.await_count == 1
+    token_generation_cache.clear()
+
+@pytest.mark.asyncio
+async def test_request_identity_loads_user_once():
+    """Test every dependency in a request shares one user lookup"""
+    from app.models import User
+    fake_user = User(id=7, email="test@example.com", name="Test User")
+    result = MagicMock()
+    result.scalars.return_value.first.return_value = fake_user
+    db = AsyncMock()
+    db.execute.return_value = result
+    request = MagicMock()
+    request.state = MagicMock(spec=[])
+
+    identity = await dependencies.get_identity(request, {"sub": "test@example.com", "uid": 7}, db)
+    assert await dependencies.get_identity(request, {"sub": "test@example.com", "uid": 7}, db) is identity
+
+    assert await dependencies.get_current_db_user(identity) is fake_user
+    with pytest.raises(HTTPException) as exc:
+        await dependencies.get_current_admin(identity)
+    assert exc.value.status_code == 403
+    assert db.execute.await_count == 1
+
+def test_verified_token_payload_is_cached_until_exp(mocker):
+    """Test a repeated token skips signature verification after the first decode"""
+    token = dependencies.create_jwt_token("test@example.com", "Test User", 42)
+    decode_spy = mocker.spy(dependencies.jwt, "decode")
+    hits_before = verified_token_cache.hits
+
+    first = dependencies.decode_access_token(token)
+    second = dependencies.decode_access_token(token)
+
+    assert first == second
+    assert decode_spy.call_count == 1
+    assert verified_token_cache.hits == hits_before + 1
+
+def test_invalid_token_is_not_cached():
+    """Test tokens that fail verification are rejected every time"""
+    import jwt
+    token = dependencies.create_jwt_token("test@example.com", "Test User", 42) + "tampered"
+
+    for _ in range(2):
+        with pytest.raises(jwt.InvalidTokenError):
+            dependencies.decode_access_token(token)
+
+@pytest.mark.asyncio
+async def test_refresh_token_lookup_uses_digest():
+    """Test sessions are looked up by the fixed-size digest, never the raw token"""
+    import hashlib
+    from app.repositories.session_repo import SessionRepository
+    token = dependencies.create_refresh_token("test@example.com")
+    db = _db_returning(None)
+
+    await SessionRepository(db).get_active_by_refresh_token(token)
+
+    params = db.execute.await_args.args[0].compile().params
+    assert hashlib.sha256(token.encode()).digest() in params.values()
+    assert token not in params.values()
+
+@pytest.mark.asyncio
+async def test_revoke_many_is_one_statement_and_marks_cache():
+    """Test bulk revocation runs a single UPDATE ... RETURNING and updates the cache"""
+    from app.repositories.session_repo import SessionRepository
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = [3, 4]
+    db = AsyncMock()
+    db.execute.return_value = result
+
+    revoked = await SessionRepository(db).revoke_many(user_id=7, device_pattern="*iPhone*", ip_address="1.2.3.4")
+
+    assert revoked == [3, 4]
+    assert db.execute.await_count == 1
+    sql = str(db.execute.await_args.args[0])
+    assert "UPDATE user_sessions" in sql and "RETURNING" in sql
+    assert "%iPhone%" in db.execute.await_args.args[0].compile().params.values()
+    assert session_state_cache.get(3) is False and session_state_cache.get(4) is False
+
+@pytest.mark.asyncio
+async def test_revoke_many_requires_a_filter():
+    """Test an unfiltered bulk revoke is refused instead of ending every session"""
+    from app.repositories.session_repo import SessionRepository
+
+    with pytest.raises(ValueError):
+        await SessionRepository(AsyncMock()).revoke_many()
@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.models import EventType
+from app.services.event_writer import SecurityEventWriter
+from app.services.security_service import SecurityService
+
+@pytest.fixture
+def db(session_local):
+    session = session_local("app.services.event_writer")
+    session.execute.side_effect = lambda stmt, rows: MagicMock(**{"scalars.return_value.all.return_value": list(range(1, len(rows) + 1))})
+    return session
+
+@pytest.fixture
+def broadcast(mocker):
+    return mocker.patch("app.services.event_writer.security_ws_manager.broadcast", AsyncMock())
+
+@pytest.mark.asyncio
+async def test_events_are_inserted_in_one_batch_then_broadcast(db, broadcast):
+    """Test queued events share one multi-row INSERT and are broadcast with their ids"""
+    writer = SecurityEventWriter(batch_size=50, flush_interval=5, max_queue=100, enqueue_timeout=1)
+    writer.start()
+    for i in range(5):
+        await writer.submit(EventType.FAILED_LOGIN, f"10.0.0.{i}", None, {"attempted_email": "a@example.com"})
+
+    await writer.stop()
+
+    assert db.execute.await_count == 1
+    assert len(db.execute.await_args.args[1]) == 5
+    db.commit.assert_awaited_once()
+    assert [call.args[0]["id"] for call in broadcast.await_args_list] == [1, 2, 3, 4, 5]
+    assert broadcast.await_args_list[0].args[0]["event_type"] == "FAILED_LOGIN"
+    assert writer.stats()["written"] == 5
+
+@pytest.mark.asyncio
+async def test_full_queue_falls_back_to_inline_write(db, broadcast):
+    """Test producers write the event themselves when the queue stays full"""
+    writer = SecurityEventWriter(batch_size=50, flush_interval=5, max_queue=1, enqueue_timeout=0.01)
+    assert await writer.submit(EventType.FAILED_LOGIN, "10.0.0.1", None, {})
+
+    assert not await writer.submit(EventType.FAILED_LOGIN, "10.0.0.2", None, {})
+
+    assert writer.overflow_writes == 1
+    assert db.execute.await_count == 1
+    assert broadcast.await_args.args[0]["ip_address"] == "10.0.0.2"
+
+@pytest.mark.asyncio
+async def test_log_event_queues_unless_durable(mocker):
+    """Test log_event defers to the running writer but commits durable events inline"""
+    submit = mocker.patch("app.services.security_service.security_event_writer.submit", AsyncMock())
+    mocker.patch("app.services.security_service.security_event_writer._task", MagicMock(done=MagicMock(return_value=False)))
+    mocker.patch("app.services.security_service.security_ws_manager.broadcast", AsyncMock())
+    db = AsyncMock()
+    db.add = MagicMock()
+
+    queued = await SecurityService.log_event(db, EventType.FAILED_LOGIN, "10.0.0.1")
+    durable = await SecurityService.log_event(db, EventType.ACTIVE_SESSION, "10.0.0.1", user_id=1, durable=True)
+
+    assert queued is None
+    submit.assert_awaited_once()
+    db.commit.assert_awaited_once()
+    assert durable is not None
+
+@pytest.mark.asyncio
+async def test_stop_writes_queue_left_by_dead_writer(db, broadcast):
+    """Test events still queued when the writer task has died are written on stop instead of dropped"""
+    writer = SecurityEventWriter(batch_size=2, flush_interval=5, max_queue=100, enqueue_timeout=1)
+    writer._task = asyncio.get_running_loop().create_future()
+    writer._task.set_exception(RuntimeError("writer crashed"))
+    for i in range(3):
+        await writer.submit(EventType.FAILED_LOGIN, f"10.0.0.{i}", None, {})
+
+    await writer.stop()
+
+    assert writer.stats()["written"] == 3
+    assert db.execute.await_count == 2
+
+@pytest.mark.asyncio
+async def test_session_id_rides_along_to_enrichment(db, broadcast, mocker):
+    """Test a pending event and its session are enriched by a single job"""
+    enqueue = mocker.patch("app.services.event_writer.location_enrichment.location_enrichment_worker.enqueue")
+    writer = SecurityEventWriter(batch_size=50, flush_interval=5, max_queue=100, enqueue_timeout=1)
+    writer.start()
+    await writer.submit(EventType.ACTIVE_SESSION, "10.0.0.1", 1, {"location": "Pending"}, session_id=9)
+
+    await writer.stop()
+
+    enqueue.assert_called_once()
+    job = enqueue.call_args.args[0]
+    assert (job.event_id, job.session_id) == (1, 9)
@@ -0,0 +1,77 @@
+import pytest
+
+from app.services.geoip import HEADER, GeoIPDatabase, GeoIPFormatError, build_database, read_csv_ranges
+
+def _write_csv(path, text):
+    path.write_text(text)
+    return str(path)
+
+def test_lookup_ipv4_and_ipv6_ranges(tmp_path):
+    """Test lookups resolve addresses inside ranges and miss gaps between them"""
+    csv_path = _write_csv(tmp_path / "ranges.csv", (
+        "start_ip,end_ip,city,country,lat,lon\n"
+        "81.2.69.0,81.2.69.255,London,United Kingdom,51.5074,-0.1278\n"
+        "1.0.0.0,1.0.0.255,Sydney,Australia,-33.8688,151.2093\n"
+        "2001:db8::,2001:db8::ffff,Gandhinagar,India,23.2156,72.6369\n"
+    ))
+    out_path = str(tmp_path / "geoip.bin")
+
+    assert build_database(read_csv_ranges(csv_path), out_path) == (2, 1)
+
+    db = GeoIPDatabase(out_path)
+    assert db.lookup("81.2.69.142")["location"] == "London, United Kingdom"
+    assert db.lookup("1.0.0.0")["location"] == "Sydney, Australia"
+    assert db.lookup("2001:db8::1")["lat"] == 23.2156
+    assert db.lookup("81.2.70.1") is None
+    assert db.lookup("0.0.0.1") is None
+    assert db.lookup("not-an-ip") is None
+    db.close()
+
+def test_headerless_dbip_layout_with_integer_addresses(tmp_path):
+    """Test the DB-IP column order is assumed when the CSV has no header"""
+    csv_path = _write_csv(tmp_path / "dbip.csv", (
+        "16777216,16777471,OC,AU,Queensland,Brisbane,-27.4679,153.0281\n"
+    ))
+    out_path = str(tmp_path / "geoip.bin")
+    build_database(read_csv_ranges(csv_path), out_path)
+
+    db = GeoIPDatabase(out_path)
+    assert db.lookup("1.0.0.7")["location"] == "Brisbane, AU"
+    db.close()
+
+def _build(tmp_path):
+    csv_path = _write_csv(tmp_path / "ranges.csv", (
+        "start_ip,end_ip,city,country,lat,lon\n"
+        "81.2.69.0,81.2.69.255,London,United Kingdom,51.5074,-0.1278\n"
+        "2001:db8::,2001:db8::ffff,Gandhinagar,India,23.2156,72.6369\n"
+    ))
+    out_path = tmp_path / "geoip.bin"
+    build_database(read_csv_ranges(csv_path), str(out_path))
+    return out_path
+
+@pytest.mark.parametrize("field, value", [
+    (1, 1_000_000),       # ipv4 count runs past the end of the file
+    (2, 1_000_000),       # ipv6 count runs past the end of the file
+    (3, 2**31),           # string table offset past the end of the file
+    (4, 2**31),           # string table length past the end of the file
+    (3, HEADER.size),     # string table overlapping the records
+])
+def test_corrupt_header_is_rejected(tmp_path, field, value):
+    """Test a header whose sections do not fit the file is refused at load time"""
+    out_path = _build(tmp_path)
+    data = bytearray(out_path.read_bytes())
+    header = list(HEADER.unpack_from(data, 0))
+    header[field] = value
+    HEADER.pack_into(data, 0, *header)
+    out_path.write_bytes(bytes(data))
+
+    with pytest.raises(GeoIPFormatError):
+        GeoIPDatabase(str(out_path))
+
+def test_truncated_file_is_rejected(tmp_path):
+    """Test a file cut short inside its string table is refused at load time"""
+    out_path = _build(tmp_path)
+    out_path.write_bytes(out_path.read_bytes()[:-3])
+
+    with pytest.raises(GeoIPFormatError):
+        GeoIPDatabase(str(out_path))
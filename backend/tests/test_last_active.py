@@ -0,0 +1,41 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from app.services.last_active import LastActiveBuffer
+
+@pytest.fixture
+def db(session_local):
+    return session_local("app.services.last_active")
+
+@pytest.mark.asyncio
+async def test_touches_coalesce_into_one_batched_update(db):
+    """Test repeated touches of a session are written once with the latest timestamp"""
+    buffer = LastActiveBuffer(flush_interval=30, max_pending=100)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(10):
+        buffer.touch(1, start + timedelta(seconds=i))
+    buffer.touch(2, start)
+
+    await buffer.flush()
+
+    assert db.execute.await_count == 1
+    rows = db.execute.await_args.args[1]
+    assert sorted(rows, key=lambda r: r["id"]) == [
+        {"id": 1, "last_active": start + timedelta(seconds=9)},
+        {"id": 2, "last_active": start},
+    ]
+    db.commit.assert_awaited_once()
+
+    await buffer.flush()
+    assert db.execute.await_count == 1
+
+def test_pending_sessions_are_bounded():
+    """Test new sessions beyond the cap are dropped while known ones still update"""
+    buffer = LastActiveBuffer(flush_interval=30, max_pending=2)
+    buffer.touch(1)
+    buffer.touch(2)
+    buffer.touch(3)
+    buffer.touch(1)
+
+    assert buffer.stats()["pending"] == 2
+    assert buffer.dropped == 1
@@ -0,0 +1,39 @@
+import pytest
+from unittest.mock import AsyncMock
+
+from app.services.location_enrichment import LocationEnrichmentWorker, EnrichmentJob
+from app.services.location_service import LocationService
+
+@pytest.fixture
+def mock_db_session(session_local):
+    return session_local("app.services.location_enrichment")
+
+@pytest.mark.asyncio
+async def test_worker_patches_rows_in_one_batch(mocker, mock_db_session):
+    """Test queued jobs are resolved, patched with bulk updates and broadcast"""
+    resolve = mocker.patch.object(LocationService, 'resolve_login_location', AsyncMock(return_value=("London, United Kingdom", "IP (Approximate)")))
+    broadcast = mocker.patch('app.services.location_enrichment.security_ws_manager.broadcast', AsyncMock())
+
+    worker = LocationEnrichmentWorker(batch_size=10, flush_interval=0.05, max_queue=10)
+    worker.start(http_client=None)
+    worker.enqueue(EnrichmentJob(ip_address="81.2.69.142", session_id=1, event_id=10, event_metadata={"provider": "local"}))
+    worker.enqueue(EnrichmentJob(ip_address="81.2.69.142", event_id=11))
+    await worker.stop()
+
+    assert resolve.call_count == 1
+    assert mock_db_session.execute.call_count == 2
+    session_rows = mock_db_session.execute.call_args_list[0].args[1]
+    event_rows = mock_db_session.execute.call_args_list[1].args[1]
+    assert session_rows == [{"id": 1, "location": "London, United Kingdom"}]
+    assert event_rows[0]["event_metadata"] == {"provider": "local", "location": "London, United Kingdom", "location_source": "IP (Approximate)"}
+    mock_db_session.commit.assert_awaited_once()
+    assert broadcast.call_count == 2
+    assert worker.stats()["batches"] == 1
+
+def test_enqueue_drops_when_queue_full():
+    """Test a full queue drops jobs instead of blocking the login"""
+    worker = LocationEnrichmentWorker(batch_size=10, flush_interval=1, max_queue=1)
+
+    assert worker.enqueue(EnrichmentJob(ip_address="1.1.1.1")) is True
+    assert worker.enqueue(EnrichmentJob(ip_address="1.1.1.2")) is False
+    assert worker.stats()["dropped"] == 1
@@ -57,3 +57,67 @@ async def test_get_ip_location_data_external_failure(mocker):
     assert data["location"] == "Unknown Location"
     assert data["lat"] is None
     assert data["lon"] is None
+
+@pytest.mark.asyncio
+async def test_resolve_login_location_budget_exceeded():
+    """Test slow lookups fall back to Unknown once the latency budget runs out"""
+    async def slow_get(*args, **kwargs):
+        await asyncio.sleep(1)
+
+    mock_client = AsyncMock()
+    mock_client.get.side_effect = slow_get
+
+    result = await LocationService.resolve_login_location("8.8.8.8", None, None, mock_client, budget_ms=50)
+
+    assert result == ("Unknown", "Unknown")
+
+@pytest.mark.asyncio
+async def test_resolve_login_location_gps_falls_back_to_ip(mocker):
+    """Test failed GPS reverse geocoding falls back to IP geolocation"""
+    mocker.patch.object(LocationService, 'get_coord_location', AsyncMock(return_value=None))
+    mocker.patch.object(LocationService, 'get_ip_location_data', AsyncMock(return_value={"location": "London, United Kingdom", "lat": 51.5, "lon": -0.12}))
+
+    result = await LocationService.resolve_login_location("8.8.8.8", 51.5, -0.12, AsyncMock(), budget_ms=500)
+
+    assert result == ("London, United Kingdom", "IP (Approximate)")
+
+@pytest.mark.asyncio
+async def test_concurrent_ip_lookups_share_one_request(mocker):
+    """Test a burst of logins from one IP triggers a single outbound lookup"""
+    from app.services.location_service import ip_location_cache
+    ip_location_cache.clear()
+
+    async def fetch(ip, client):
+        await asyncio.sleep(0.01)
+        return {"location": "London, United Kingdom", "lat": 51.5, "lon": -0.12}
+
+    fetch_mock = mocker.patch.object(LocationService, '_fetch_ip_location_data', side_effect=fetch)
+
+    results = await asyncio.gather(*(LocationService.get_ip_location_data("81.2.69.142", None) for _ in range(20)))
+    again = await LocationService.get_ip_location_data("81.2.69.142", None)
+
+    assert all(r["location"] == "London, United Kingdom" for r in results)
+    assert again["location"] == "London, United Kingdom"
+    assert fetch_mock.call_count == 1
+    ip_location_cache.clear()
+
+def test_geohash_matches_reference_encoding():
+    """Test geohash cells follow the standard encoding and group nearby points"""
+    from app.services.location_service import geohash
+
+    assert geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert geohash(23.2156, 72.6369, 5) == geohash(23.2170, 72.6381, 5)
+
+@pytest.mark.asyncio
+async def test_coord_lookups_cached_by_geohash_cell(mocker):
+    """Test logins from the same area reuse one reverse-geocoding result"""
+    from app.services.location_service import coord_location_cache
+    coord_location_cache.clear()
+    fetch_mock = mocker.patch.object(LocationService, '_fetch_coord_location', AsyncMock(return_value="Gandhinagar, India"))
+
+    first = await LocationService.get_coord_location(23.2156, 72.6369, None)
+    second = await LocationService.get_coord_location(23.2170, 72.6381, None)
+
+    assert first == second == "Gandhinagar, India"
+    assert fetch_mock.call_count == 1
+    coord_location_cache.clear()
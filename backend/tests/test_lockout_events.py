@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.lockout_events import LockoutEventRecorder
+from app.models import EventType
+
+@pytest.fixture
+def log_event(mocker, session_local):
+    session = session_local("app.services.lockout_events")
+    session.execute.return_value = MagicMock(**{"all.return_value": [("victim@example.com", 7)]})
+    mocker.patch("app.services.lockout_events.location_enrichment.is_deferred", return_value=True)
+    mocker.patch("app.services.lockout_events.location_enrichment.location_enrichment_worker.enqueue")
+    return mocker.patch(
+        "app.services.lockout_events.SecurityService.log_event",
+        AsyncMock(return_value=MagicMock(id=1)),
+    )
+
+@pytest.mark.asyncio
+async def test_rejections_are_written_as_one_event_per_ip(log_event):
+    """Test many rejected attempts from one IP produce a single aggregated event"""
+    recorder = LockoutEventRecorder(flush_interval=30, max_ips=100)
+    for i in range(50):
+        recorder.record("1.2.3.4", f"user{i % 3}@example.com")
+    recorder.record("5.6.7.8", "victim@example.com")
+
+    await recorder.flush()
+
+    assert log_event.await_count == 2
+    by_ip = {call.args[2]: call for call in log_event.await_args_list}
+    metadata = by_ip["1.2.3.4"].kwargs["event_metadata"]
+    assert by_ip["1.2.3.4"].args[1] == EventType.ACCOUNT_LOCKED
+    assert metadata["blocked_attempts"] == 50
+    assert metadata["targeted_emails"] == ["user0@example.com", "user1@example.com", "user2@example.com"]
+    assert by_ip["1.2.3.4"].kwargs["user_id"] is None
+    assert by_ip["5.6.7.8"].kwargs["event_metadata"]["targeted_email"] == "victim@example.com"
+    assert by_ip["5.6.7.8"].kwargs["user_id"] == 7
+
+    await recorder.flush()
+    assert log_event.await_count == 2
+
+@pytest.mark.asyncio
+async def test_known_targets_get_their_own_event(log_event):
+    """Test attempts against an existing account are written with its user_id, the rest stay unattributed"""
+    recorder = LockoutEventRecorder(flush_interval=30, max_ips=100)
+    for _ in range(3):
+        recorder.record("1.2.3.4", "victim@example.com")
+    recorder.record("1.2.3.4", "ghost@example.com")
+    recorder.record("1.2.3.4", None)
+
+    await recorder.flush()
+
+    events = {call.kwargs["user_id"]: call.kwargs["event_metadata"] for call in log_event.await_args_list}
+    assert events[7]["blocked_attempts"] == 3
+    assert events[7]["targeted_emails"] == ["victim@example.com"]
+    assert events[None]["blocked_attempts"] == 2
+    assert events[None]["targeted_email"] == "ghost@example.com"
+
+@pytest.mark.asyncio
+async def test_inline_locations_are_resolved_concurrently(log_event, mocker):
+    """Test per-IP location lookups overlap instead of running one after another"""
+    mocker.patch("app.services.lockout_events.location_enrichment.is_deferred", return_value=False)
+    in_flight, peak = 0, 0
+
+    async def resolve(ip, lat, lon, client):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return ("Paris, France", "IP")
+
+    mocker.patch("app.services.lockout_events.LocationService.resolve_login_location", side_effect=resolve)
+    recorder = LockoutEventRecorder(flush_interval=30, max_ips=100)
+    recorder._http_client = MagicMock()
+    for i in range(5):
+        recorder.record(f"10.0.0.{i}", None)
+
+    await recorder.flush()
+
+    assert peak == 5
+    assert all(call.kwargs["event_metadata"]["location"] == "Paris, France" for call in log_event.await_args_list)
+
+def test_pending_ips_are_bounded():
+    """Test new IPs beyond the cap are counted as dropped"""
+    recorder = LockoutEventRecorder(flush_interval=30, max_ips=2)
+    for ip in ("1.1.1.1", "2.2.2.2", "3.3.3.3"):
+        recorder.record(ip, None)
+    recorder.record("1.1.1.1", None)
+
+    assert recorder.stats()["pending_ips"] == 2
+    assert recorder.dropped == 1
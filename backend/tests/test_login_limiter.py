@@ -0,0 +1,62 @@
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.login_limiter import LoginLimiter
+
+def _limiter(clock, email_threshold=0):
+    return LoginLimiter(window=300, ip_threshold=5, email_threshold=email_threshold, max_keys=1000, clock=clock)
+
+def test_ip_locks_after_threshold_and_slides_open(clock):
+    """Test the fifth failure locks the IP until the oldest one leaves the window"""
+    limiter = _limiter(clock)
+    for _ in range(4):
+        limiter.record_failure("1.2.3.4", "a@example.com")
+        clock.now += 10
+    assert not limiter.is_locked("1.2.3.4")
+
+    limiter.record_failure("1.2.3.4", "a@example.com")
+    assert limiter.is_locked("1.2.3.4")
+    assert limiter.retry_after("1.2.3.4") == pytest.approx(260)
+    assert not limiter.is_locked("5.6.7.8")
+
+    clock.now += 260
+    assert not limiter.is_locked("1.2.3.4")
+
+def test_email_lockout_is_opt_in(clock):
+    """Test a distributed attack on one email only locks it when enabled"""
+    disabled, enabled = _limiter(clock), _limiter(clock, email_threshold=3)
+    for i in range(3):
+        disabled.record_failure(f"10.0.0.{i}", "Victim@example.com")
+        enabled.record_failure(f"10.0.0.{i}", "Victim@example.com")
+
+    assert not disabled.is_locked("10.0.0.99", "victim@example.com")
+    assert enabled.is_locked("10.0.0.99", "victim@example.com")
+
+@pytest.mark.asyncio
+async def test_rebuild_replays_recent_failures(clock, mocker):
+    """Test startup rebuild restores lockouts from FAILED_LOGIN events"""
+    limiter = _limiter(clock)
+    created_at = datetime.fromtimestamp(clock.now - 60, tz=timezone.utc)
+    mocker.patch(
+        "app.services.login_limiter.SecurityService.recent_failed_logins",
+        AsyncMock(return_value=[("1.2.3.4", "a@example.com", created_at)] * 5),
+    )
+
+    await limiter.rebuild(MagicMock())
+
+    assert limiter.is_locked("1.2.3.4")
+    assert limiter.retry_after("1.2.3.4") == pytest.approx(240)
+
+def test_locked_response_is_precomputed_429(clock):
+    """Test locked clients get a 429 with Retry-After and open clients get None"""
+    limiter = _limiter(clock)
+    for _ in range(5):
+        limiter.record_failure("1.2.3.4")
+
+    response = limiter.locked_response("1.2.3.4")
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "300"
+    assert b"Too many failed login attempts" in response.body
+    assert limiter.locked_response("5.6.7.8") is None
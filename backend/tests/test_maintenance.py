@@ -0,0 +1,105 @@
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.models import SecurityEvent
+from app.services.batch_delete import delete_in_batches
+from app.services.maintenance import MaintenanceScheduler, PartitionMaintainer, maintenance_lock
+
+def _conn(*rowcounts):
+    conn = AsyncMock()
+    conn.execute.side_effect = [MagicMock(rowcount=n) for n in rowcounts]
+    return conn
+
+@pytest.mark.asyncio
+async def test_delete_in_batches_commits_each_chunk_until_short_batch():
+    """Test chunked deletes stop once a chunk comes back smaller than the batch size"""
+    conn = _conn(100, 100, 40)
+
+    removed = await delete_in_batches(conn, SecurityEvent, SecurityEvent.id > 0, time.monotonic() + 60, batch_size=100)
+
+    assert removed == 240
+    assert conn.execute.await_count == 3
+    assert conn.commit.await_count == 3
+    sql = str(conn.execute.await_args_list[0].args[0])
+    assert "DELETE FROM security_events" in sql and "LIMIT" in sql
+
+@pytest.mark.asyncio
+async def test_delete_in_batches_respects_deadline():
+    """Test no chunk is started once the time budget is spent"""
+    conn = _conn(100)
+
+    removed = await delete_in_batches(conn, SecurityEvent, SecurityEvent.id > 0, time.monotonic() - 1, batch_size=100)
+
+    assert removed == 0
+    conn.execute.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_jobs_report_rows_and_survive_failures():
+    """Test a failing job is rolled back and the remaining jobs still run"""
+    scheduler = MaintenanceScheduler(interval=3600, jitter=0, time_budget=30)
+    scheduler.register("broken", AsyncMock(side_effect=RuntimeError("boom")))
+    scheduler.register("events", AsyncMock(return_value=12))
+    conn = AsyncMock()
+
+    removed = await scheduler._run_jobs(conn)
+
+    assert removed == {"events": 12}
+    conn.rollback.assert_awaited_once()
+    assert scheduler.stats()["rows_removed"] == {"broken": 0, "events": 12}
+    assert scheduler.last_run["rows_removed"] == {"events": 12}
+
+@pytest.mark.asyncio
+async def test_maintenance_lock_skips_when_held_elsewhere_and_waits_on_request():
+    """Test the try-lock yields False without unlocking, while wait=True blocks for the lock and releases it"""
+    held = AsyncMock()
+    held.execute.return_value = MagicMock(scalar=MagicMock(return_value=False))
+    async with maintenance_lock(held) as locked:
+        assert locked is False
+    assert held.execute.await_count == 1
+
+    waiting = AsyncMock()
+    async with maintenance_lock(waiting, wait=True) as locked:
+        assert locked is True
+    sql = [str(call.args[0]) for call in waiting.execute.await_args_list]
+    assert sql == ["SELECT pg_advisory_lock(:key)", "SELECT pg_advisory_unlock(:key)"]
+
+@pytest.mark.asyncio
+async def test_partition_maintainer_creates_partitions_under_waiting_lock(mocker):
+    """Test a partition check waits for the maintenance lock and reports what it created"""
+    conn = AsyncMock()
+    engine = mocker.patch("app.services.maintenance.engine")
+    engine.connect.return_value.__aenter__.return_value = conn
+    lock = mocker.patch("app.services.maintenance.maintenance_lock")
+    lock.return_value.__aenter__.return_value = True
+    mocker.patch("app.services.maintenance.prepare_partitions", AsyncMock(return_value=["security_events_p20261026"]))
+    maintainer = PartitionMaintainer(interval=3600)
+
+    assert await maintainer.run_once() == ["security_events_p20261026"]
+    lock.assert_called_once_with(conn, wait=True)
+    assert maintainer.stats()["partitions_created"] == 1
+
+@pytest.mark.asyncio
+async def test_partitions_are_created_with_maintenance_disabled(mocker):
+    """Test startup creates partitions and keeps checking for new ones when maintenance is off"""
+    from app import main
+
+    mocker.patch.object(main.settings, "maintenance_enabled", False)
+    mocker.patch.object(main.settings, "algorithm", "HS256")
+    mocker.patch.object(main.settings, "location_enrichment", "inline")
+    mocker.patch.object(main.settings, "bcrypt_rounds", 12)
+    engine = mocker.patch.object(main, "engine")
+    engine.begin.return_value.__aenter__.return_value = AsyncMock()
+    mocker.patch.object(main, "AsyncSessionLocal", MagicMock())
+    mocker.patch.object(main.login_limiter, "rebuild", AsyncMock())
+    for worker in ("security_event_writer", "lockout_events", "last_active_buffer", "maintenance_scheduler"):
+        mocker.patch.object(main, worker)
+    maintainer = mocker.patch.object(main, "partition_maintainer")
+    maintainer.run_once = AsyncMock(return_value=[])
+
+    await main.startup()
+    await main.app.state.http_client.aclose()
+
+    maintainer.run_once.assert_awaited_once()
+    maintainer.start.assert_called_once()
+    main.maintenance_scheduler.start.assert_not_called()
@@ -0,0 +1,80 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.otp_store import MemoryOTPStore, DatabaseOTPStore, OTPResult
+
+@pytest.fixture
+def store():
+    return MemoryOTPStore(ttl=300, max_attempts=3, max_entries=100)
+
+@pytest.mark.asyncio
+async def test_memory_code_is_single_use(store):
+    """Test a valid code verifies once and is then consumed"""
+    code = await store.issue(1)
+
+    assert await store.verify(1, code) == OTPResult.VALID
+    assert await store.verify(1, code) == OTPResult.INVALID
+
+@pytest.mark.asyncio
+async def test_memory_reissue_replaces_previous_code(store):
+    """Test resending invalidates the earlier code"""
+    first = await store.issue(1)
+    second = await store.issue(1)
+
+    if first != second:
+        assert await store.verify(1, first) == OTPResult.INVALID
+    assert await store.verify(1, second) == OTPResult.VALID
+
+@pytest.mark.asyncio
+async def test_memory_code_locks_after_max_attempts(store):
+    """Test repeated wrong guesses discard the code"""
+    code = await store.issue(1)
+    wrong = "000000" if code != "000000" else "111111"
+
+    assert await store.verify(1, wrong) == OTPResult.INVALID
+    assert await store.verify(1, wrong) == OTPResult.INVALID
+    assert await store.verify(1, wrong) == OTPResult.LOCKED
+    assert await store.verify(1, code) == OTPResult.INVALID
+
+@pytest.mark.asyncio
+async def test_memory_code_expires():
+    """Test codes past the TTL report EXPIRED, like the database store, and are then discarded"""
+    store = MemoryOTPStore(ttl=300, max_attempts=3, max_entries=100)
+    clock = MagicMock(return_value=1000.0)
+    store._codes._clock = clock
+    code = await store.issue(1)
+
+    clock.return_value = 1301.0
+    assert await store.verify(1, code) == OTPResult.EXPIRED
+    assert await store.verify(1, code) == OTPResult.INVALID
+
+def _result(row):
+    result = MagicMock()
+    result.first.return_value = row
+    return result
+
+@pytest.mark.asyncio
+async def test_database_valid_code_is_one_delete():
+    """Test a correct code is consumed with a single statement and commit"""
+    db = AsyncMock()
+    db.add = MagicMock()
+    db.execute.return_value = _result((7,))
+
+    outcome = await DatabaseOTPStore(db, ttl=300, max_attempts=3).verify(1, "123456")
+
+    assert outcome == OTPResult.VALID
+    assert db.execute.await_count == 1
+    db.commit.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_database_wrong_code_counts_attempt_then_locks():
+    """Test the last allowed wrong guess deletes the code"""
+    from datetime import datetime, timedelta, timezone
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=5)
+    db = AsyncMock()
+    db.execute.side_effect = [_result(None), _result((3, expires_at)), MagicMock()]
+
+    outcome = await DatabaseOTPStore(db, ttl=300, max_attempts=3).verify(1, "000000")
+
+    assert outcome == OTPResult.LOCKED
+    assert db.execute.await_count == 3
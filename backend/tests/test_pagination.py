@@ -0,0 +1,63 @@
+import pytest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from fastapi import HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.models import SecurityEvent
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor, newest_first, set_next_cursor
+
+def _sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+def test_cursor_round_trips_timestamp_and_id():
+    """Test a cursor decodes back to the exact (created_at, id) it was built from"""
+    created_at = datetime(2026, 10, 18, 9, 30, 15, 123456, tzinfo=timezone.utc)
+
+    cursor = encode_cursor(created_at, 98765)
+
+    assert "," not in cursor and "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, 98765)
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    "bm90LWEtY3Vyc29y",
+    encode_cursor(datetime(2026, 1, 1, tzinfo=timezone.utc), 1)[:-3],
+    encode_cursor(datetime(2026, 1, 1), 1),
+])
+def test_invalid_cursor_is_rejected(cursor):
+    """Test malformed, truncated or timezone-less cursors give a 400 instead of a server error"""
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+
+    assert exc.value.status_code == 400
+
+def test_newest_first_orders_with_id_tiebreaker():
+    """Test the first page is ordered by created_at then id, both descending, with no key filter"""
+    sql = _sql(newest_first(select(SecurityEvent), SecurityEvent, None))
+
+    assert "ORDER BY security_events.created_at DESC, security_events.id DESC" in sql
+    assert "WHERE" not in sql
+
+def test_newest_first_filters_strictly_after_cursor():
+    """Test a cursor page filters on the (created_at, id) row value plus a plain created_at bound"""
+    cursor = encode_cursor(datetime(2026, 10, 18, tzinfo=timezone.utc), 42)
+
+    sql = _sql(newest_first(select(SecurityEvent), SecurityEvent, cursor))
+
+    assert "(security_events.created_at, security_events.id) < (" in sql
+    assert "security_events.created_at <= " in sql
+
+def test_next_cursor_only_set_on_full_page():
+    """Test the next cursor points at the last row of a full page and is omitted on the last page"""
+    created_at = datetime(2026, 10, 18, tzinfo=timezone.utc)
+    rows = [SimpleNamespace(id=i, created_at=created_at) for i in (3, 2)]
+
+    full, short = Response(), Response()
+    set_next_cursor(full, rows, limit=2)
+    set_next_cursor(short, rows, limit=5)
+
+    assert decode_cursor(full.headers[NEXT_CURSOR_HEADER]) == (created_at, 2)
+    assert NEXT_CURSOR_HEADER not in short.headers
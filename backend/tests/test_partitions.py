@@ -0,0 +1,114 @@
+import time
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services import partitions
+from app.services.partitions import period_start, partition_name, ensure_future_partitions, drop_expired_partitions
+
+UTC = timezone.utc
+
+def _conn_with_partitions(*bounds):
+    """A connection whose partition listing returns the given (name, pg_get_expr bound) rows"""
+    conn = AsyncMock()
+    listing = MagicMock()
+    listing.all.return_value = list(bounds)
+    conn.execute.return_value = listing
+    return conn
+
+def _bound(lower, upper, detach_pending=False):
+    return (f"FOR VALUES FROM ('{lower}') TO ('{upper}')", detach_pending)
+
+def _executed_sql(conn):
+    return [str(call.args[0]) for call in conn.execute.await_args_list]
+
+def test_period_start_aligns_to_utc_monday_or_midnight():
+    """Test weekly periods start on Monday 00:00 UTC and daily ones at midnight UTC"""
+    at = datetime(2026, 10, 18, 15, 30, tzinfo=UTC)  # a Sunday
+
+    assert period_start(at, "week") == datetime(2026, 10, 12, tzinfo=UTC)
+    assert period_start(at, "day") == datetime(2026, 10, 18, tzinfo=UTC)
+    assert partition_name(period_start(at, "week")) == "security_events_p20261012"
+
+@pytest.mark.asyncio
+async def test_ensure_future_partitions_creates_only_missing_periods():
+    """Test partitions are created for the current and upcoming weeks, skipping ones that exist"""
+    conn = _conn_with_partitions(
+        ("security_events_p20261012", *_bound("2026-10-12 00:00:00+00", "2026-10-19 00:00:00+00")),
+    )
+
+    created = await ensure_future_partitions(conn, "week", 2, now=datetime(2026, 10, 18, tzinfo=UTC))
+
+    assert created == ["security_events_p20261019", "security_events_p20261026"]
+    ddl = [sql for sql in _executed_sql(conn) if sql.startswith("CREATE TABLE")]
+    assert len(ddl) == 2
+    assert "FROM ('2026-10-19T00:00:00+00:00') TO ('2026-10-26T00:00:00+00:00')" in ddl[0]
+
+@pytest.mark.asyncio
+async def test_ensure_future_partitions_skips_days_covered_by_weekly_partition():
+    """Test switching to daily partitions does not overlap an existing weekly one"""
+    conn = _conn_with_partitions(
+        ("security_events_p20261012", *_bound("2026-10-12 00:00:00+00", "2026-10-19 00:00:00+00")),
+    )
+
+    created = await ensure_future_partitions(conn, "day", 1, now=datetime(2026, 10, 18, tzinfo=UTC))
+
+    assert created == ["security_events_p20261019"]
+
+@pytest.mark.asyncio
+async def test_ensure_future_partitions_rolls_back_failed_create():
+    """Test a partition that cannot be attached is logged and skipped rather than raised"""
+    conn = _conn_with_partitions()
+    conn.execute.side_effect = [conn.execute.return_value, Exception("permission denied")]
+
+    created = await ensure_future_partitions(conn, "week", 0, now=datetime(2026, 10, 18, tzinfo=UTC))
+
+    assert created == []
+    conn.rollback.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_drop_expired_partitions_detaches_concurrently_and_counts_rows():
+    """Test expired partitions are detached concurrently before the drop and their rows are counted"""
+    conn = _conn_with_partitions(
+        ("security_events_p20260907", *_bound("2026-09-07 00:00:00+00", "2026-09-14 00:00:00+00")),
+        ("security_events_p20260831", *_bound("2026-08-31 00:00:00+00", "2026-09-07 00:00:00+00", detach_pending=True)),
+        ("security_events_p20260914", *_bound("2026-09-14 00:00:00+00", "2026-09-21 00:00:00+00")),
+    )
+    conn.execute.return_value.scalar.return_value = 500
+
+    removed = await drop_expired_partitions(conn, datetime(2026, 9, 15, tzinfo=UTC), time.monotonic() + 60)
+
+    assert removed == 1000
+    sql = _executed_sql(conn)
+    assert 'DETACH PARTITION "security_events_p20260831" FINALIZE' in " ".join(sql)
+    assert 'DETACH PARTITION "security_events_p20260907" CONCURRENTLY' in " ".join(sql)
+    drops = [line for line in sql if line.startswith("DROP TABLE")]
+    assert drops == ['DROP TABLE IF EXISTS "security_events_p20260831"', 'DROP TABLE IF EXISTS "security_events_p20260907"']
+    detach = next(i for i, line in enumerate(sql) if 'DETACH PARTITION "security_events_p20260907"' in line)
+    assert sql.index(drops[1]) > detach
+    conn.execution_options.assert_any_await(isolation_level="AUTOCOMMIT")
+
+@pytest.mark.asyncio
+async def test_drop_expired_partitions_respects_deadline():
+    """Test no partition is dropped once the job's time budget is spent"""
+    conn = _conn_with_partitions(
+        ("security_events_p20260831", *_bound("2026-08-31 00:00:00+00", "2026-09-07 00:00:00+00")),
+    )
+
+    removed = await drop_expired_partitions(conn, datetime(2026, 9, 15, tzinfo=UTC), time.monotonic() - 1)
+
+    assert removed == 0
+    assert not any(line.startswith("DROP") for line in _executed_sql(conn))
+
+@pytest.mark.asyncio
+async def test_retention_on_unpartitioned_table_only_deletes(mocker):
+    """Test a database without the partitioned table falls back to chunked deletes"""
+    mocker.patch.object(partitions, "is_partitioned", AsyncMock(return_value=False))
+    ensure = mocker.patch.object(partitions, "ensure_future_partitions", AsyncMock())
+    delete = mocker.patch.object(partitions, "delete_in_batches", AsyncMock(return_value=7))
+
+    removed = await partitions.security_event_retention(AsyncMock(), deadline=0)
+
+    assert removed == 7
+    ensure.assert_not_awaited()
+    delete.assert_awaited_once()
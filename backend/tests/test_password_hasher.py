@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+
+from app.core.password_hasher import PasswordHasher
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_roundtrip():
+    """Test hashing on the worker pool produces a hash that verifies"""
+    hasher = PasswordHasher(max_workers=2, max_queue=4)
+    hashed = await hasher.hash("securepassword")
+
+    assert await hasher.verify("securepassword", hashed) is True
+    assert await hasher.verify("wrongpassword", hashed) is False
+    assert hasher.stats()["completed"] == 3
+    hasher.shutdown()
+
+@pytest.mark.asyncio
+async def test_rejects_when_queue_full():
+    """Test jobs beyond workers + queue size are rejected with 503"""
+    hasher = PasswordHasher(max_workers=1, max_queue=1)
+    hashed = hasher.hash_sync("securepassword")
+
+    results = await asyncio.gather(
+        *(hasher.verify("securepassword", hashed) for _ in range(4)),
+        return_exceptions=True
+    )
+
+    rejected = [r for r in results if isinstance(r, HTTPException)]
+    assert len(rejected) == 2
+    assert rejected[0].status_code == 503
+    assert hasher.stats()["rejected"] == 2
+    assert hasher.stats()["peak_pending"] == 2
+    hasher.shutdown()
+
+def test_needs_rehash_compares_stored_cost():
+    """Test only hashes below the current bcrypt cost are flagged for upgrade"""
+    hasher = PasswordHasher(max_workers=1, max_queue=1, rounds=5)
+    hashed = hasher.hash_sync("securepassword")
+
+    assert hasher.needs_rehash(hashed) is False
+    hasher.rounds = 6
+    assert hasher.needs_rehash(hashed) is True
+    hasher.rounds = 4
+    assert hasher.needs_rehash(hashed) is False
+    assert hasher.needs_rehash("not-a-bcrypt-hash") is False
+    hasher.shutdown()
+
+def test_calibrate_stays_within_bounds():
+    """Test calibration never picks a cost outside the configured range"""
+    hasher = PasswordHasher(max_workers=1, max_queue=1)
+
+    assert hasher.calibrate(target_ms=0.001, min_rounds=4, max_rounds=6, samples=1) == 4
+    assert hasher.calibrate(target_ms=60_000, min_rounds=4, max_rounds=6, samples=1) == 6
+    hasher.shutdown()
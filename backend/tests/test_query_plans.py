@@ -0,0 +1,178 @@
+"""EXPLAIN checks for the security event hot queries; needs TEST_DATABASE_URL pointing at a disposable Postgres database."""
+
+import os
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi import Response
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.core.database import Base
+from app.core.pagination import encode_cursor
+from app.api import security as security_api, users as users_api
+from app.services.partitions import PARENT, period_start, period_length, partition_name
+from app.services.security_service import SecurityService
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+SCHEMA = "query_plan_test"
+EVENT_ROWS = 300_000
+SEED_DAYS = 35
+USERS = 2_000
+
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+@pytest.fixture(scope="module")
+def plan_db():
+    url = make_url(TEST_DATABASE_URL).set(drivername="postgresql+psycopg2")
+    admin_engine = create_engine(url)
+    with admin_engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+
+    engine = create_engine(url, connect_args={"options": f"-csearch_path={SCHEMA}"})
+    Base.metadata.create_all(engine)
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        start = period_start(now - timedelta(days=SEED_DAYS), "week")
+        while start <= now:
+            end = start + period_length("week")
+            conn.execute(text(
+                f'CREATE TABLE "{partition_name(start)}" PARTITION OF "{PARENT}" '
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+            start = end
+
+        conn.execute(text(
+            "INSERT INTO users (id, email, name, role, provider, token_generation) "
+            "SELECT g, 'user' || g || '@example.com', 'User ' || g, 'USER', 'local', 0 "
+            "FROM generate_series(1, :users) g"
+        ), {"users": USERS})
+        # Mostly refreshes, with a few percent each of logins and failures, spread evenly over the period
+        conn.execute(text(
+            "INSERT INTO security_events (user_id, event_type, ip_address, event_metadata, created_at) "
+            "SELECT 1 + g % :users, "
+            "  (CASE WHEN g % 100 < 5 THEN 'ACTIVE_SESSION' WHEN g % 100 < 10 THEN 'FAILED_LOGIN' "
+            "        WHEN g % 100 < 12 THEN 'SUSPICIOUS_ACTIVITY' ELSE 'REFRESH_USED' END)::eventtype, "
+            "  '10.' || (g % 200) || '.' || (g % 250) || '.1', '{}'::json, "
+            "  :now - g * (:days * interval '1 day') / :rows "
+            "FROM generate_series(1, :rows) g"
+        ), {"users": USERS, "rows": EVENT_ROWS, "days": SEED_DAYS - 1, "now": now})
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f'VACUUM ANALYZE "{PARENT}"'))
+        conn.execute(text("VACUUM ANALYZE users"))
+
+    yield engine
+
+    engine.dispose()
+    with admin_engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    admin_engine.dispose()
+
+async def _statements(call, rows=()):
+    """Run an app coroutine against a mock session and return the statements it executed"""
+    result = MagicMock()
+    result.all.return_value = list(rows)
+    result.scalars.return_value.all.return_value = []
+    result.scalars.return_value.first.return_value = MagicMock(id=42, ip_address="10.0.0.1")
+    db = AsyncMock()
+    db.execute.return_value = result
+    await call(db)
+    return [c.args[0] for c in db.execute.await_args_list]
+
+def _plan_nodes(engine, stmt):
+    """(node type, relation or index) of every node in the plan for `stmt`"""
+    sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        plan = conn.execute(text("EXPLAIN (FORMAT JSON) " + sql)).scalar()[0]["Plan"]
+
+    nodes = []
+    def walk(node):
+        nodes.append((node["Node Type"], node.get("Relation Name") or node.get("Index Name")))
+        for child in node.get("Plans", []):
+            walk(child)
+    walk(plan)
+    return nodes
+
+def _assert_indexed(engine, stmt, ordered=False):
+    """Assert nothing is sequentially scanned; with `ordered`, that rows come out of the index in order"""
+    nodes = _plan_nodes(engine, stmt)
+    seq_scans = [rel for node, rel in nodes if node == "Seq Scan"]
+    assert not seq_scans, f"sequential scan on {seq_scans}: {nodes}"
+    assert any(node in INDEX_SCANS for node, _ in nodes), nodes
+    if ordered:
+        # A bitmap scan returns rows unordered, so it would show up here as a Sort
+        assert not any(node in ("Sort", "Incremental Sort") for node, _ in nodes), nodes
+
+@pytest.mark.asyncio
+async def test_recent_failed_logins_uses_index(plan_db):
+    """Test the login limiter rebuild query reads the failed-login index"""
+    since = datetime.now(timezone.utc) - timedelta(seconds=settings.login_lockout_window_s)
+    stmts = await _statements(lambda db: SecurityService.recent_failed_logins(db, since))
+
+    _assert_indexed(plan_db, stmts[0])
+
+@pytest.mark.asyncio
+async def test_check_suspicious_activity_uses_index(plan_db):
+    """Test the recent-login lookup for one user is an index scan"""
+    stmts = await _statements(lambda db: SecurityService.check_suspicious_activity(db, user_id=42, current_ip="10.0.0.1"))
+
+    _assert_indexed(plan_db, stmts[0])
+
+@pytest.mark.asyncio
+async def test_active_users_queries_use_index(plan_db):
+    """Test both the active-user aggregate and the per-user last login lookup use an index"""
+    stmts = await _statements(
+        lambda db: security_api.get_active_users(days=7, db=db, admin=None),
+        rows=[(42, datetime.now(timezone.utc), 3)],
+    )
+
+    aggregate, _user_lookup, last_login = stmts
+    _assert_indexed(plan_db, aggregate)
+    _assert_indexed(plan_db, last_login)
+
+@pytest.mark.asyncio
+async def test_admin_event_feed_uses_index(plan_db):
+    """Test the newest-first admin feed walks the created_at index instead of sorting the table"""
+    stmts = await _statements(lambda db: security_api.get_security_events(
+        Response(), skip=0, limit=20, cursor=None, event_type=None, user_id=None, db=db, admin=None
+    ))
+
+    _assert_indexed(plan_db, stmts[0], ordered=True)
+
+@pytest.mark.asyncio
+async def test_my_security_events_uses_index(plan_db):
+    """Test a user's own event history is served from the per-user index"""
+    db_user = MagicMock(id=42)
+    db_user.name = "User 42"
+    stmts = await _statements(lambda db: users_api.get_my_security_events(
+        Response(), skip=0, limit=20, cursor=None, event_type=None, db_user=db_user, db=db
+    ))
+
+    _assert_indexed(plan_db, stmts[0], ordered=True)
+
+@pytest.mark.asyncio
+async def test_admin_event_feed_cursor_page_uses_index(plan_db):
+    """Test a page far back in the feed is still an index range scan rather than an offset walk"""
+    cursor = encode_cursor(datetime.now(timezone.utc) - timedelta(days=20), 1)
+    stmts = await _statements(lambda db: security_api.get_security_events(
+        Response(), skip=0, limit=20, cursor=cursor, event_type=None, user_id=None, db=db, admin=None
+    ))
+
+    _assert_indexed(plan_db, stmts[0], ordered=True)
+
+@pytest.mark.asyncio
+async def test_my_security_events_cursor_page_is_ordered_index_scan(plan_db):
+    """Test a deep page of a user's history reads the per-user index in order without sorting"""
+    db_user = MagicMock(id=42)
+    db_user.name = "User 42"
+    cursor = encode_cursor(datetime.now(timezone.utc) - timedelta(days=20), 1)
+    stmts = await _statements(lambda db: users_api.get_my_security_events(
+        Response(), skip=0, limit=20, cursor=cursor, event_type=None, db_user=db_user, db=db
+    ))
+
+    _assert_indexed(plan_db, stmts[0], ordered=True)
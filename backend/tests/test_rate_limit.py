@@ -0,0 +1,94 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+from app.core.rate_limit import RateLimiter, RateLimitMiddleware, RouteGroup, rate_limiter
+
+def _limiter(clock, max_buckets=100):
+    return RateLimiter(
+        global_rate=10, global_burst=20,
+        groups=[RouteGroup("auth", ("/api/auth/register",), rate=1, burst=2)],
+        max_buckets=max_buckets, clock=clock,
+    )
+
+def test_route_group_bucket_refills(clock):
+    """Test a group bucket rejects past its burst and refills at its rate"""
+    limiter = _limiter(clock)
+
+    assert limiter.check("1.2.3.4", "/api/auth/register") == 0
+    assert limiter.check("1.2.3.4", "/api/auth/register") == 0
+    assert limiter.check("1.2.3.4", "/api/auth/register") == pytest.approx(1)
+    assert limiter.check("5.6.7.8", "/api/auth/register") == 0
+    assert limiter.check("1.2.3.4", "/api/users/me") == 0
+
+    clock.now += 1
+    assert limiter.check("1.2.3.4", "/api/auth/register") == 0
+    assert limiter.rejected["auth"] == 1
+
+def test_global_bucket_applies_to_every_route(clock):
+    """Test the per-IP global bucket caps traffic across all paths"""
+    limiter = _limiter(clock)
+    for i in range(20):
+        assert limiter.check("1.2.3.4", f"/api/employees/{i}") == 0
+
+    assert limiter.check("1.2.3.4", "/api/employees/") > 0
+    assert limiter.rejected["global"] == 1
+
+def test_idle_buckets_are_evicted(clock):
+    """Test full buckets expire and the table stays within its bound"""
+    limiter = _limiter(clock, max_buckets=10)
+    for i in range(50):
+        limiter.check(f"10.0.0.{i}", "/api/employees/")
+    assert limiter.stats()["buckets"] == 10
+
+    clock.now += 60
+    limiter.check("10.0.1.1", "/api/employees/")
+    assert limiter.stats()["buckets"] <= 10
+    assert limiter.check("10.0.0.49", "/api/employees/") == 0
+
+def test_middleware_returns_429_with_retry_after(clock):
+    """Test throttled requests are answered by the middleware with Retry-After"""
+    app = FastAPI()
+    calls = []
+
+    @app.post("/api/auth/register")
+    async def register():
+        calls.append(1)
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware, limiter=_limiter(clock))
+    client = TestClient(app)
+
+    statuses = [client.post("/api/auth/register").status_code for _ in range(3)]
+    response = client.post("/api/auth/register")
+
+    assert statuses == [200, 200, 429]
+    assert response.headers["Retry-After"] == "1"
+    assert response.json() == {"detail": "Too many requests"}
+    assert len(calls) == 2
+
+def test_second_factor_steps_do_not_spend_login_tokens():
+    """Test the 2FA steps under /api/auth/login have their own bucket instead of the login one"""
+    assert rate_limiter.group_for("/api/auth/login").name == "auth"
+    for path in ("/api/auth/login/verify-2fa", "/api/auth/login/verify-totp", "/api/auth/login/resend-otp"):
+        assert rate_limiter.group_for(path).name == "second_factor"
+
+def test_forwarded_clients_behind_trusted_proxy_get_their_own_buckets(clock):
+    """Test clients forwarded by a trusted proxy are limited separately rather than as the proxy's address"""
+    app = FastAPI()
+
+    @app.post("/api/auth/register")
+    async def register():
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware, limiter=_limiter(clock))
+    app.add_middleware(ProxyHeadersMiddleware, trusted_hosts="testclient")
+    client = TestClient(app)
+
+    statuses = [
+        client.post("/api/auth/register", headers={"X-Forwarded-For": f"203.0.113.{i}"}).status_code
+        for i in range(5)
+    ]
+
+    assert statuses == [200] * 5
@@ -0,0 +1,38 @@
+import math
+import os
+import random
+
+from app.services.reverse_geocoder import ReverseGeocoder, load_reverse_geocoder, _to_xyz
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cities.csv")
+
+def test_bundled_dataset_resolves_nearby_coordinates():
+    """Test coordinates near a bundled centroid resolve to that city"""
+    geocoder = load_reverse_geocoder(DATASET)
+
+    assert geocoder.lookup(23.22, 72.65, max_km=75) == "Gandhinagar, India"
+    assert geocoder.lookup(51.50, -0.12, max_km=75) == "London, United Kingdom"
+    assert geocoder.lookup(-33.87, 151.21, max_km=75) == "Sydney, Australia"
+
+def test_lookup_respects_max_distance():
+    """Test points far from every centroid return None instead of a distant city"""
+    geocoder = load_reverse_geocoder(DATASET)
+
+    assert geocoder.lookup(0.0, -140.0, max_km=75) is None
+
+def test_nearest_matches_brute_force_across_antimeridian():
+    """Test the KD-tree agrees with a linear scan, including near the antimeridian"""
+    rng = random.Random(7)
+    places = [(f"P{i}", "X", rng.uniform(-80, 80), rng.uniform(-180, 180)) for i in range(500)]
+    places.append(("East", "X", 0.0, 179.9))
+    places.append(("West", "X", 0.0, -179.9))
+    geocoder = ReverseGeocoder(places)
+
+    def brute_force(lat, lon):
+        target = _to_xyz(lat, lon)
+        return min(places, key=lambda p: math.dist(_to_xyz(p[2], p[3]), target))[0]
+
+    assert geocoder.nearest(0.0, -179.99)[0] == "West, X"
+    for _ in range(200):
+        lat, lon = rng.uniform(-80, 80), rng.uniform(-180, 180)
+        assert geocoder.nearest(lat, lon)[0] == f"{brute_force(lat, lon)}, X"
@@ -0,0 +1,87 @@
+import os
+import jwt
+import pytest
+
+from app.core.signing_keys import KeyRing, DAY_S
+
+@pytest.fixture
+def ring(tmp_path, clock):
+    ring = KeyRing(str(tmp_path), rotation_s=30 * DAY_S, retain_s=8 * DAY_S, clock=clock)
+    ring.rotate_if_due()
+    return ring
+
+def test_sign_and_verify_with_kid(ring):
+    """Test tokens carry the active kid and verify against the ring"""
+    token = ring.sign({"sub": "test@example.com"})
+
+    assert jwt.get_unverified_header(token)["kid"] == ring.current_kid
+    assert ring.verify(token)["sub"] == "test@example.com"
+
+def test_jwks_verifies_token_without_private_key(ring):
+    """Test a downstream verifier can check tokens using only the published JWKS"""
+    token = ring.sign({"sub": "test@example.com"})
+    jwk = ring.jwks()["keys"][0]
+
+    assert jwk["kty"] == "OKP" and jwk["crv"] == "Ed25519" and "d" not in jwk
+    public_key = jwt.PyJWK(jwk).key
+    assert jwt.decode(token, public_key, algorithms=["EdDSA"])["sub"] == "test@example.com"
+
+def test_rotation_keeps_old_key_until_retained_period_ends(ring, clock):
+    """Test rotation signs with a new key while old tokens verify until retention ends"""
+    old_kid = ring.current_kid
+    old_token = ring.sign({"sub": "test@example.com"})
+
+    clock.now += 30 * DAY_S
+    assert ring.rotate_if_due()
+    assert ring.current_kid != old_kid
+    assert ring.verify(old_token)["sub"] == "test@example.com"
+    assert len(ring.jwks()["keys"]) == 2
+
+    clock.now += 8 * DAY_S
+    assert not ring.rotate_if_due()
+    assert [k["kid"] for k in ring.jwks()["keys"]] == [ring.current_kid]
+    with pytest.raises(jwt.InvalidTokenError):
+        ring.verify(old_token)
+
+def test_unknown_kid_is_rejected_without_reloading(tmp_path, ring, clock, mocker):
+    """Test a token with a kid the ring has not loaded fails without touching the key directory"""
+    other = KeyRing(str(tmp_path), rotation_s=30 * DAY_S, retain_s=8 * DAY_S, clock=clock)
+    clock.now += 30 * DAY_S
+    other.rotate_if_due()
+    token = other.sign({"sub": "test@example.com"})
+    load = mocker.spy(ring, "load")
+
+    with pytest.raises(jwt.InvalidTokenError):
+        ring.verify(token)
+    load.assert_not_called()
+
+def test_new_key_signs_only_after_activation_delay(tmp_path, clock):
+    """Test a rotated key is published straight away but other workers see it before it signs"""
+    signer = KeyRing(str(tmp_path), rotation_s=30 * DAY_S, retain_s=8 * DAY_S, activation_s=7200, clock=clock)
+    verifier = KeyRing(str(tmp_path), rotation_s=30 * DAY_S, retain_s=8 * DAY_S, activation_s=7200, clock=clock)
+    signer.rotate_if_due()
+    first_kid = signer.current_kid
+
+    clock.now += 30 * DAY_S
+    assert signer.rotate_if_due()
+    assert signer.current_kid == first_kid
+    assert len(signer.jwks()["keys"]) == 2
+
+    verifier.rotate_if_due()
+    clock.now += 7200
+    token = signer.sign({"sub": "test@example.com"})
+    assert jwt.get_unverified_header(token)["kid"] != first_kid
+    assert verifier.verify(token)["sub"] == "test@example.com"
+
+def test_keys_created_in_the_same_second_pick_the_same_signer(tmp_path, clock, mocker):
+    """Test workers agree on the signing key when two were generated in the same second, whatever the listing order"""
+    first = KeyRing(str(tmp_path), rotation_s=30 * DAY_S, retain_s=8 * DAY_S, clock=clock)
+    second = KeyRing(str(tmp_path), rotation_s=30 * DAY_S, retain_s=8 * DAY_S, clock=clock)
+    kids = [first._generate(), second._generate()]
+
+    first.load()
+    listdir = os.listdir
+    mocker.patch("app.core.signing_keys.os.listdir", side_effect=lambda path: list(reversed(listdir(path))))
+    second.load()
+
+    assert first.current_kid == second.current_kid == max(kids)
@@ -11,6 +11,16 @@ export const useSecurityWebSocket = (user, eventTypeFilter, limit, setAlerts, se
         ws.onmessage = (event) => {
             const newEvent = JSON.parse(event.data);
 
+            // Deferred location enrichment patches events that were logged as "Pending"
+            if (newEvent.type === "location_update") {
+                const patch = (e) => e.id === newEvent.event_id
+                    ? { ...e, event_metadata: { ...e.event_metadata, location: newEvent.location, location_source: newEvent.location_source } }
+                    : e;
+                setAlerts(prevAlerts => prevAlerts.map(patch));
+                setLogs(prevLogs => prevLogs.map(patch));
+                return;
+            }
+
             if (newEvent.event_type === "SUSPICIOUS_ACTIVITY" || newEvent.event_type === "ACCOUNT_LOCKED") {
                 setAlerts(prevAlerts => [newEvent, ...prevAlerts].slice(0, 10));
             }
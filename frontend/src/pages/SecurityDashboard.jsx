@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import { useDispatch, useSelector } from "react-redux";
 import { formatDistanceToNow } from "date-fns";
 import {
@@ -29,6 +29,8 @@ const SecurityDashboard = () => {
 
     const [eventTypeFilter, setEventTypeFilter] = useState("");
     const [page, setPage] = useState(0);
+    // pageCursors.current[n] is the cursor that fetches page n; page 0 needs none
+    const pageCursors = useRef([null]);
     const limit = 10;
     const navigate = useNavigate();
 
@@ -89,10 +91,14 @@ const SecurityDashboard = () => {
                             is_session: true
                         }));
                     } else {
-                        logsData = await securityApi.getEvents(page * limit, limit, eventTypeFilter);
+                        const { events, nextCursor } = await securityApi.getEventsPage(limit, eventTypeFilter, pageCursors.current[page]);
+                        logsData = events;
+                        pageCursors.current[page + 1] = nextCursor;
                     }
                 } else {
-                    logsData = await securityApi.getOwnEvents(page * limit, limit, eventTypeFilter);
+                    const { events, nextCursor } = await securityApi.getOwnEventsPage(limit, eventTypeFilter, pageCursors.current[page]);
+                    logsData = events;
+                    pageCursors.current[page + 1] = nextCursor;
                 }
                 setLogs(logsData);
             } catch (err) {
@@ -295,7 +301,7 @@ const SecurityDashboard = () => {
                                 <select
                                     className={styles.filterSelect}
                                     value={eventTypeFilter}
-                                    onChange={(e) => { setEventTypeFilter(e.target.value); setPage(0); }}
+                                    onChange={(e) => { pageCursors.current = [null]; setEventTypeFilter(e.target.value); setPage(0); }}
                                 >
                                     <option value="">All Events</option>
                                     <option value="FAILED_LOGIN">Failed Logins</option>
@@ -385,7 +391,7 @@ const SecurityDashboard = () => {
                                 </button>
                                 <span style={{ color: '#718096', alignSelf: 'center', fontSize: '0.9rem' }}>Page {page + 1}</span>
                                 <button
-                                    disabled={logs.length < limit || eventTypeFilter === "ACTIVE_USER_SESSION"}
+                                    disabled={!pageCursors.current[page + 1] || eventTypeFilter === "ACTIVE_USER_SESSION"}
                                     onClick={() => setPage(p => p + 1)}
                                     className={`${buttonStyles.btn} ${buttonStyles.btnGoogle}`}
                                     style={{ width: 'auto', padding: '6px 16px', margin: 0 }}
@@ -15,6 +15,21 @@ export const securityApi = {
     }
   },
 
+  // Cursor-paged feed: returns { events, nextCursor }, nextCursor is null on the last page
+  getEventsPage: async (limit = 20, eventType = "", cursor = null) => {
+    try {
+      const params = new URLSearchParams({ limit });
+      if (eventType) params.append("event_type", eventType);
+      if (cursor) params.append("cursor", cursor);
+
+      const response = await api.get(`/api/admin/security/events?${params.toString()}`);
+      return { events: response.data, nextCursor: response.headers["x-next-cursor"] || null };
+    } catch (error) {
+      console.error("Error fetching security events:", error);
+      throw error;
+    }
+  },
+
   getActiveUsers: async (days = 7) => {
     try {
       const response = await api.get(`/api/admin/security/active-users?days=${days}`);
@@ -25,13 +40,14 @@ export const securityApi = {
     }
   },
 
-  getOwnEvents: async (skip = 0, limit = 20, eventType = "") => {
+  getOwnEventsPage: async (limit = 20, eventType = "", cursor = null) => {
     try {
-      const params = new URLSearchParams({ skip, limit });
+      const params = new URLSearchParams({ limit });
       if (eventType) params.append("event_type", eventType);
+      if (cursor) params.append("cursor", cursor);
 
       const response = await api.get(`/api/users/me/security-events?${params.toString()}`);
-      return response.data;
+      return { events: response.data, nextCursor: response.headers["x-next-cursor"] || null };
     } catch (error) {
       console.error("Error fetching personal security events:", error);
       throw error;